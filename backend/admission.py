@@ -0,0 +1,70 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict
+
+
+# requests of one conversation queued behind the running one, more are rejected
+THREAD_MAX_WAITING = int(os.getenv("THREAD_MAX_WAITING", "2"))
+THREAD_WAIT_TIMEOUT_SECONDS = float(os.getenv("THREAD_WAIT_TIMEOUT_SECONDS", "120"))
+THREAD_RETRY_AFTER_SECONDS = 5
+
+
+class ThreadBusyError(RuntimeError):
+    def __init__(self, message: str, retry_after: int = THREAD_RETRY_AFTER_SECONDS):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class _ThreadEntry:
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    users: int = 0
+
+
+# serializes requests of the same thread_id, otherwise concurrent runs read the
+# same checkpoint and the last write wins. locks live only while someone holds or
+# waits for them; with several uvicorn workers the same thread must be routed to
+# the same worker for this to hold
+class ThreadLocks:
+    def __init__(self, max_waiting: int, wait_timeout: float):
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+        self._entries: Dict[str, _ThreadEntry] = {}
+
+    def busy(self, thread_id: str) -> bool:
+        entry = self._entries.get(thread_id)
+        # one user holds the lock, the rest wait
+        return entry is not None and entry.users > self.max_waiting
+
+    def waiting(self) -> int:
+        return sum(max(entry.users - 1, 0) for entry in self._entries.values())
+
+    @asynccontextmanager
+    async def hold(self, thread_id: str) -> AsyncIterator[None]:
+        if self.busy(thread_id):
+            raise ThreadBusyError(f"thread {thread_id} already has a request running and queued")
+        entry = self._entries.setdefault(thread_id, _ThreadEntry())
+        entry.users += 1
+        try:
+            try:
+                await asyncio.wait_for(entry.lock.acquire(), self.wait_timeout)
+            except asyncio.TimeoutError:
+                raise ThreadBusyError(
+                    f"thread {thread_id} is still busy after {self.wait_timeout:g}s"
+                ) from None
+            try:
+                yield
+            finally:
+                entry.lock.release()
+        finally:
+            entry.users -= 1
+            if entry.users == 0:
+                self._entries.pop(thread_id, None)
+
+    def stats(self) -> dict:
+        return {"active": len(self._entries), "waiting": self.waiting()}
+
+
+thread_locks = ThreadLocks(THREAD_MAX_WAITING, THREAD_WAIT_TIMEOUT_SECONDS)
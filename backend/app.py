@@ -1,109 +1,276 @@
 from contextlib import asynccontextmanager
+import asyncio
+import json
 import os
+import time
+from typing import Optional
 
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
-from langchain_core.messages import AIMessage
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from langchain_core.messages import AIMessage, BaseMessage
 from langchain_core.runnables import RunnableConfig
 from langgraph.checkpoint.memory import MemorySaver
-from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
-from openinference.instrumentation.langchain import LangChainInstrumentor
-from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
-from phoenix.otel import register
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
+from src.agent.admission import LLMCapacityError, llm_limiter
 from src.agent.graph import build_graph
-from src.agent.state import AgentState
-from src.database import init_db
+from src.agent.utils import aclose_llm_clients
+from src.database import (
+    CHECKPOINT_RETENTION_INTERVAL_SECONDS,
+    dispose_engine,
+    get_pool_stats,
+    init_db,
+    run_checkpoint_retention,
+    shared_pool_checkpointer,
+    warm_up_pool,
+)
+from src.database.models import get_async_engine
+from src.tools import shutdown_code_search, warm_up_symbol_index
+from src.tracing import setup_tracing, shutdown_tracing
 
+from .admission import ThreadBusyError, thread_locks
+from .metrics import (
+    IN_FLIGHT,
+    REQUEST_DURATION,
+    REQUESTS_REJECTED,
+    instrument_checkpointer,
+    instrument_engine,
+    metrics_callback,
+    register_runtime_collector,
+)
 from .models import MessageRequest, MessageResponse
 
 load_dotenv()
 
-tracer_provider = register(
-    project_name="aboba",
-    auto_instrument=False,
-)
-LangChainInstrumentor().instrument(tracer_provider=tracer_provider)
-HTTPXClientInstrumentor().instrument()
-tracer = tracer_provider.get_tracer("aboba")
-
 checkpointer = None
 graph = None
 
+# node and tool names that are reported to /chat/stream clients as progress events
+# subgraph nodes (devlead, code_reader, summarize, ...) are visible too, since
+# astream_events also yields events of runnables nested into tools
+STREAM_PROGRESS_NODES = {
+    "compact_history",
+    "Supervisor",
+    "supervisor_routing",
+    "devlead",
+    "code_reader",
+    "researcher",
+    "tools",
+    "summarize",
+}
+STREAM_PROGRESS_TOOLS = {"call_coder", "call_researcher"}
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     global checkpointer, graph
     database_url = os.getenv("DATABASE_URL")
-    if database_url:
-        try:
-            db_url_for_checkpoint = database_url.replace("postgresql+psycopg://", "postgresql://")
-            async with AsyncPostgresSaver.from_conn_string(db_url_for_checkpoint) as checkpointer:
-                await checkpointer.setup()
-                await init_db()
+    retention_task = None
+    setup_tracing()
+    register_runtime_collector()
+    # symbol index is parsed in background, lookups made before it finishes just wait
+    symbol_index_task = asyncio.create_task(warm_up_symbol_index())
+    try:
+        if database_url:
+            try:
+                await warm_up_pool()
+                instrument_engine(get_async_engine())
+                async with shared_pool_checkpointer() as checkpointer:
+                    await checkpointer.setup()
+                    await init_db()
+                    instrument_checkpointer(checkpointer)
+                    graph = build_graph(checkpointer=checkpointer)
+                    if CHECKPOINT_RETENTION_INTERVAL_SECONDS > 0:
+                        retention_task = asyncio.create_task(run_checkpoint_retention())
+                    yield
+            except Exception as _:
+                checkpointer = MemorySaver()
+                instrument_checkpointer(checkpointer)
                 graph = build_graph(checkpointer=checkpointer)
                 yield
-        except Exception as _:
+        else:
             checkpointer = MemorySaver()
+            instrument_checkpointer(checkpointer)
             graph = build_graph(checkpointer=checkpointer)
             yield
-    else:
-        checkpointer = MemorySaver()
-        graph = build_graph(checkpointer=checkpointer)
-        yield
+    finally:
+        if retention_task is not None:
+            retention_task.cancel()
+        symbol_index_task.cancel()
+        shutdown_code_search()
+        await aclose_llm_clients()
+        await dispose_engine()
+        shutdown_tracing()
 
 
 app = FastAPI(lifespan=lifespan)
 
 
+def message_text(message: BaseMessage) -> str:
+    if isinstance(message.content, list):
+        text = ""
+        for part in message.content:
+            if isinstance(part, str):
+                text += part
+            elif isinstance(part, dict) and "text" in part:
+                text += part["text"]
+        return text
+    if isinstance(message.content, str):
+        return message.content
+    return str(message.content)
+
+
+def build_config(thread_id: str) -> RunnableConfig:
+    use_db = bool(os.getenv("DATABASE_URL"))
+    return RunnableConfig(
+        callbacks=[metrics_callback],
+        configurable={
+            "thread_id": thread_id,
+            "llm_api_base": os.getenv("OPENAI_API_BASE"),
+            "llm_api_key": os.getenv("OPENAI_API_KEY"),
+            "model": os.getenv("MODEL"),
+            "use_db": use_db,
+        }
+    )
+
+
+def admission_error(exc: BaseException) -> Optional[Exception]:
+    # capacity errors may come wrapped by tools or the graph, look through the chain
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        if isinstance(exc, (ThreadBusyError, LLMCapacityError)):
+            return exc
+        seen.add(id(exc))
+        exc = exc.__cause__ or exc.__context__
+    return None
+
+
+def count_rejection(endpoint: str, exc: Exception) -> None:
+    REQUESTS_REJECTED.labels(endpoint, "thread_busy" if isinstance(exc, ThreadBusyError) else "llm_capacity").inc()
+
+
+def reject(endpoint: str, exc: Exception) -> HTTPException:
+    # 429 when the client should slow down on its own thread, 503 when the whole service is full
+    count_rejection(endpoint, exc)
+    status_code = 429 if isinstance(exc, ThreadBusyError) else 503
+    return HTTPException(status_code=status_code, detail=str(exc), headers={"Retry-After": str(exc.retry_after)})
+
+
+def check_admission(endpoint: str, thread_id: str) -> None:
+    # cheap checks before any work is done, so overloaded service answers right away
+    if thread_locks.busy(thread_id):
+        raise reject(endpoint, ThreadBusyError(f"thread {thread_id} already has a request running and queued"))
+    if llm_limiter.saturated():
+        raise reject(endpoint, LLMCapacityError("LLM capacity exhausted", llm_limiter.retry_after()))
+
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
 @app.post("/chat", response_model=MessageResponse)
 async def chat(request: MessageRequest):
     if graph is None:
         raise HTTPException(status_code=503, detail="Graph not initialized")
+    check_admission("/chat", request.thread_id)
+    started = time.perf_counter()
+    status = "error"
     try:
-        use_db = bool(os.getenv("DATABASE_URL"))
-        config = RunnableConfig(
-            configurable={
-                "thread_id": request.thread_id,
-                "llm_api_base": os.getenv("OPENAI_API_BASE"),
-                "llm_api_key": os.getenv("OPENAI_API_KEY"),
-                "model": os.getenv("MODEL"),
-                "use_db": use_db,
-            }
-        )
-        
-        existing_state = await graph.aget_state(config=config)
-        messages = existing_state.values.get("messages", [])
-        input_state = {
-            **existing_state.values,
-            "messages": messages,
-            "user_query": request.message,
-        }
-        
-        result = await graph.ainvoke(AgentState(**input_state), config=config)
+        with IN_FLIGHT.labels("/chat").track_inprogress():
+            config = build_config(request.thread_id)
+            # requests of one thread run one after another, each sees the previous checkpoint
+            async with thread_locks.hold(request.thread_id):
+                # only the new query is sent, the rest of the state comes from checkpointer
+                result = await graph.ainvoke({"user_query": request.message}, config=config)
         messages = result.get("messages", [])
         last_message = messages[-1]
         
         if not isinstance(last_message, AIMessage):
             raise ValueError("Last message is not an AIMessage")
 
-        if isinstance(last_message.content, list):
-            final_response = ""
-            for part in last_message.content:
-                if isinstance(part, str):
-                    final_response += part
-                elif isinstance(part, dict) and "text" in part:
-                    final_response += part["text"]
-        elif isinstance(last_message.content, str):
-            final_response = last_message.content
-        else:
-            final_response = str(last_message.content)
-
-        return MessageResponse(response=final_response)
+        status = "ok"
+        return MessageResponse(response=message_text(last_message))
     except Exception as e:
+        rejected = admission_error(e)
+        if rejected is not None:
+            status = "rejected"
+            raise reject("/chat", rejected)
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        REQUEST_DURATION.labels("/chat", status).observe(time.perf_counter() - started)
+
+
+# sse events: `progress` when graph nodes / subagent tools start, `token` with chunks of
+# the supervisor response, `reset` when the streamed supervisor turn turned out to be
+# a delegation (tool calls) instead of the final answer, and terminal `done` or `error`
+@app.post("/chat/stream")
+async def chat_stream(request: MessageRequest):
+    if graph is None:
+        raise HTTPException(status_code=503, detail="Graph not initialized")
+    check_admission("/chat/stream", request.thread_id)
+    config = build_config(request.thread_id)
+
+    async def event_stream():
+        started = time.perf_counter()
+        status = "error"
+        IN_FLIGHT.labels("/chat/stream").inc()
+        try:
+            final_response = None
+            # lock is taken inside the stream, so it is released even if the client goes away
+            async with thread_locks.hold(request.thread_id):
+                async for event in graph.astream_events(
+                    {"user_query": request.message}, config=config, version="v2"
+                ):
+                    kind = event["event"]
+                    name = event.get("name")
+                    node = event.get("metadata", {}).get("langgraph_node")
+                    if kind == "on_chain_start" and name in STREAM_PROGRESS_NODES and name == node:
+                        yield sse_event("progress", {"node": name})
+                    elif kind == "on_tool_start" and name in STREAM_PROGRESS_TOOLS:
+                        yield sse_event("progress", {"node": name})
+                    elif kind == "on_chat_model_stream" and node == "Supervisor":
+                        text = message_text(event["data"]["chunk"])
+                        if text:
+                            yield sse_event("token", {"text": text})
+                    elif kind == "on_chat_model_end" and node == "Supervisor":
+                        output = event["data"].get("output")
+                        if isinstance(output, AIMessage) and output.tool_calls:
+                            yield sse_event("reset", {"tool_calls": [tc["name"] for tc in output.tool_calls]})
+                    elif kind == "on_chain_end" and not event.get("parent_ids"):
+                        output = event["data"].get("output") or {}
+                        messages = output.get("messages", []) if isinstance(output, dict) else []
+                        if messages and isinstance(messages[-1], AIMessage):
+                            final_response = message_text(messages[-1])
+            if final_response is None:
+                raise ValueError("Last message is not an AIMessage")
+            status = "ok"
+            yield sse_event("done", {"response": final_response})
+        except Exception as e:
+            rejected = admission_error(e)
+            if rejected is not None:
+                # headers are already sent, the retry hint goes into the event
+                status = "rejected"
+                count_rejection("/chat/stream", rejected)
+                yield sse_event("error", {"detail": str(rejected), "retry_after": rejected.retry_after})
+            else:
+                yield sse_event("error", {"detail": str(e)})
+        finally:
+            IN_FLIGHT.labels("/chat/stream").dec()
+            REQUEST_DURATION.labels("/chat/stream", status).observe(time.perf_counter() - started)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.get("/health")
 async def health():
-    return {"status": "ok"}
+    return {"status": "ok", "db_pool": get_pool_stats()}
+
+
+@app.get("/metrics")
+async def metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
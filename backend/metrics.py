@@ -0,0 +1,241 @@
+import time
+import weakref
+from typing import Any, Dict, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from sqlalchemy import event
+
+from src.agent.admission import llm_limiter
+from src.database import get_pool_stats
+from src.tools import summary_cache_stats
+
+from .admission import thread_locks
+
+
+# graph nodes take from milliseconds (routing) to minutes (subagents)
+NODE_BUCKETS = (0.005, 0.025, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+CHECKPOINTER_METHODS = ("aput", "aput_writes", "aget_tuple")
+DB_OPERATIONS = {
+    "SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "CREATE", "ALTER", "BEGIN", "COMMIT", "ROLLBACK"
+}
+# runs that never finished (e.g. cancelled streams) are dropped above this
+MAX_OPEN_RUNS = 10000
+
+NODE_DURATION = Histogram(
+    "agent_node_duration_seconds",
+    "Wall time of graph nodes",
+    ["node", "status"],
+    buckets=NODE_BUCKETS,
+)
+TOOL_DURATION = Histogram(
+    "agent_tool_duration_seconds",
+    "Wall time of tool calls",
+    ["tool", "status"],
+    buckets=NODE_BUCKETS,
+)
+LLM_DURATION = Histogram(
+    "llm_request_duration_seconds",
+    "Wall time of chat model calls",
+    ["node", "status"],
+    buckets=NODE_BUCKETS,
+)
+LLM_TOKENS = Counter("llm_tokens", "Tokens reported by the model", ["node", "kind"])
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Duration of SQLAlchemy statements",
+    ["operation"],
+    buckets=DB_BUCKETS,
+)
+CHECKPOINT_DURATION = Histogram(
+    "checkpoint_operation_duration_seconds",
+    "Duration of checkpointer calls",
+    ["operation"],
+    buckets=DB_BUCKETS,
+)
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Duration of chat requests",
+    ["endpoint", "status"],
+    buckets=NODE_BUCKETS,
+)
+IN_FLIGHT = Gauge("http_requests_in_flight", "Chat requests being processed", ["endpoint"])
+REQUESTS_REJECTED = Counter(
+    "http_requests_rejected", "Chat requests rejected by admission control", ["endpoint", "reason"]
+)
+
+
+# graph callbacks feed the histograms directly, nothing goes through the otel exporter.
+# run_inline keeps the handler on the event loop instead of a thread pool hop per event
+class MetricsCallbackHandler(BaseCallbackHandler):
+    run_inline = True
+
+    def __init__(self):
+        self._runs: Dict[UUID, Tuple[Histogram, str, float]] = {}
+
+    def _start(self, run_id: UUID, histogram: Histogram, label: str) -> None:
+        if len(self._runs) > MAX_OPEN_RUNS:
+            self._runs.clear()
+        self._runs[run_id] = (histogram, label, time.perf_counter())
+
+    def _end(self, run_id: UUID, status: str) -> Optional[str]:
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return None
+        histogram, label, started = run
+        histogram.labels(label, status).observe(time.perf_counter() - started)
+        return label
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs: Any) -> None:
+        node = (metadata or {}).get("langgraph_node")
+        # graph emits many inner chains per node, the node itself carries its own name
+        if node is not None and kwargs.get("name") == node:
+            self._start(run_id, NODE_DURATION, node)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs: Any) -> None:
+        self._end(run_id, "ok")
+
+    def on_chain_error(self, error, *, run_id, **kwargs: Any) -> None:
+        self._end(run_id, "error")
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs: Any) -> None:
+        self._start(
+            run_id, TOOL_DURATION, kwargs.get("name") or (serialized or {}).get("name", "unknown")
+        )
+
+    def on_tool_end(self, output, *, run_id, **kwargs: Any) -> None:
+        self._end(run_id, "ok")
+
+    def on_tool_error(self, error, *, run_id, **kwargs: Any) -> None:
+        self._end(run_id, "error")
+
+    def on_chat_model_start(
+        self, serialized, messages, *, run_id, metadata=None, **kwargs: Any
+    ) -> None:
+        self._start(run_id, LLM_DURATION, (metadata or {}).get("langgraph_node", "unknown"))
+
+    def on_llm_end(self, response: LLMResult, *, run_id, **kwargs: Any) -> None:
+        node = self._end(run_id, "ok")
+        if node is None:
+            return
+        prompt_tokens = completion_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                prompt_tokens += usage.get("input_tokens", 0)
+                completion_tokens += usage.get("output_tokens", 0)
+        if not prompt_tokens and not completion_tokens:
+            token_usage = (response.llm_output or {}).get("token_usage") or {}
+            prompt_tokens = token_usage.get("prompt_tokens", 0)
+            completion_tokens = token_usage.get("completion_tokens", 0)
+        if prompt_tokens:
+            LLM_TOKENS.labels(node, "prompt").inc(prompt_tokens)
+        if completion_tokens:
+            LLM_TOKENS.labels(node, "completion").inc(completion_tokens)
+
+    def on_llm_error(self, error, *, run_id, **kwargs: Any) -> None:
+        self._end(run_id, "error")
+
+
+metrics_callback = MetricsCallbackHandler()
+
+
+# values that already live in the process are read at scrape time, no hot path cost
+class RuntimeStatsCollector:
+    def collect(self):
+        cache = summary_cache_stats()
+        lookups = cache["hits"] + cache["misses"]
+        for name, value, help_text in (
+            ("summary_cache_hits", cache["hits"], "Summary LRU cache hits"),
+            ("summary_cache_misses", cache["misses"], "Summary LRU cache misses"),
+            ("summary_cache_evictions", cache["evictions"], "Summary LRU cache evictions"),
+            ("summary_cache_entries", cache["entries"], "Entries in summary LRU cache"),
+            ("summary_cache_bytes", cache["bytes"], "Size of summary LRU cache"),
+            (
+                "summary_cache_hit_ratio",
+                cache["hits"] / lookups if lookups else 0.0,
+                "Summary LRU cache hit ratio",
+            ),
+        ):
+            yield GaugeMetricFamily(name, help_text, value=value)
+        pool = get_pool_stats()
+        for key in ("size", "checked_out", "checked_in", "overflow"):
+            if key in pool:
+                yield GaugeMetricFamily(
+                    f"db_pool_{key}", f"SQLAlchemy pool {key.replace('_', ' ')}", value=pool[key]
+                )
+        llm = llm_limiter.stats()
+        yield GaugeMetricFamily(
+            "llm_queue_depth", "LLM calls waiting for a concurrency slot", value=llm["waiting"]
+        )
+        yield GaugeMetricFamily(
+            "llm_calls_in_flight", "LLM calls holding a concurrency slot", value=llm["in_flight"]
+        )
+        yield CounterMetricFamily(
+            "llm_calls_rejected", "LLM calls rejected by admission control", value=llm["rejected"]
+        )
+        threads = thread_locks.stats()
+        yield GaugeMetricFamily(
+            "thread_locks_active", "Conversations with a request running", value=threads["active"]
+        )
+        yield GaugeMetricFamily(
+            "thread_queue_depth",
+            "Requests waiting for their conversation",
+            value=threads["waiting"],
+        )
+
+
+_collector_registered = False
+_instrumented_engines = weakref.WeakSet()
+
+
+def register_runtime_collector() -> None:
+    global _collector_registered
+    if not _collector_registered:
+        REGISTRY.register(RuntimeStatsCollector())
+        _collector_registered = True
+
+
+def instrument_engine(async_engine) -> None:
+    sync_engine = async_engine.sync_engine
+    if sync_engine in _instrumented_engines:
+        return
+    _instrumented_engines.add(sync_engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+        DB_QUERY_DURATION.labels(operation if operation in DB_OPERATIONS else "OTHER").observe(
+            time.perf_counter() - started
+        )
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_started"):
+            conn.info["query_started"].pop()
+
+
+def instrument_checkpointer(checkpointer) -> None:
+    # wraps methods on the instance, works for both memory and postgres savers
+    for name in CHECKPOINTER_METHODS:
+        method = getattr(checkpointer, name)
+        histogram = CHECKPOINT_DURATION.labels(name)
+
+        async def timed(*args, _method=method, _histogram=histogram, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await _method(*args, **kwargs)
+            finally:
+                _histogram.observe(time.perf_counter() - started)
+
+        setattr(checkpointer, name, timed)
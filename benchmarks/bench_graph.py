@@ -0,0 +1,250 @@
+"""End-to-end benchmark of the graph against the stub llm server, no network needed.
+
+Measures what the framework adds on top of model latency: per-node wall time,
+time spent in the checkpointer and memory, for MemorySaver and (when DATABASE_URL
+is set) the postgres checkpointer:
+
+    python -m benchmarks.bench_graph --iterations 10 --token-delay 0.005
+    python -m benchmarks.bench_graph --checkpointer postgres --tracemalloc
+
+Long term memory goes to a temporary directory, so the first iteration summarizes
+files with the (stub) model and later ones are served from memory, like in production.
+"""
+import argparse
+import asyncio
+import os
+import resource
+import statistics
+import tempfile
+import time
+import tracemalloc
+import uuid
+from collections import defaultdict
+
+# must be set before src is imported, memory dirs are read at import time
+os.environ.setdefault("LONG_TERM_MEMORY_DIR", tempfile.mkdtemp(prefix="bench_memory_"))
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.memory import MemorySaver
+
+from benchmarks.stub_llm_server import StubSettings, start_in_thread
+from src.agent.graph import build_graph
+from src.agent.utils import aclose_llm_clients
+from src.database import dispose_engine, init_db, shared_pool_checkpointer, warm_up_pool
+
+
+QUERIES = [
+    "Explain what the code in main.py does",
+    "Find papers about retrieval augmented generation for code",
+    "Explain the code of main.py and find papers on code summarization it could use",
+]
+CHECKPOINTER_METHODS = ("aput", "aput_writes", "aget_tuple")
+SUBAGENT_TOOLS = {"call_coder": "coder", "call_researcher": "researcher"}
+
+
+class CheckpointTimer:
+    # wraps checkpointer methods on the instance, graph calls go through the wrappers
+    def __init__(self, checkpointer):
+        self.seconds = defaultdict(float)
+        self.calls = defaultdict(int)
+        for name in CHECKPOINTER_METHODS:
+            setattr(checkpointer, name, self._timed(name, getattr(checkpointer, name)))
+
+    def _timed(self, name, method):
+        async def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await method(*args, **kwargs)
+            finally:
+                self.seconds[name] += time.perf_counter() - started
+                self.calls[name] += 1
+        return timed
+
+    def reset(self):
+        self.seconds.clear()
+        self.calls.clear()
+
+
+def union_seconds(intervals: list) -> float:
+    # total length covered by (start, end) intervals, overlapping parts counted once
+    total = 0.0
+    covered_until = float("-inf")
+    for start, end in sorted(intervals):
+        if end > covered_until:
+            total += end - max(start, covered_until)
+            covered_until = end
+    return total
+
+
+async def run_query(
+    graph, query: str, config: RunnableConfig, node_times: dict
+) -> tuple[float, float, float]:
+    # returns (wall seconds, seconds with at least one llm call running, summed llm seconds);
+    # node times are keyed by subagent/node
+    starts = {}
+    subagent_runs = {}
+    llm_intervals = []
+    started = time.perf_counter()
+    async for event in graph.astream_events({"user_query": query}, config=config, version="v2"):
+        kind = event["event"]
+        now = time.perf_counter()
+        run_id = event["run_id"]
+        if kind == "on_tool_start" and event["name"] in SUBAGENT_TOOLS:
+            subagent_runs[run_id] = SUBAGENT_TOOLS[event["name"]]
+        elif kind in ("on_chat_model_start", "on_chain_start"):
+            starts[run_id] = now
+        elif kind == "on_chat_model_end" and run_id in starts:
+            llm_intervals.append((starts.pop(run_id), now))
+        elif kind == "on_chain_end" and run_id in starts:
+            start = starts.pop(run_id)
+            node = event.get("metadata", {}).get("langgraph_node")
+            if node is None or event["name"] != node:
+                continue
+            subagent = next(
+                (subagent_runs[p] for p in event.get("parent_ids", []) if p in subagent_runs), None
+            )
+            node_times[f"{subagent}/{node}" if subagent else node].append(now - start)
+    wall = time.perf_counter() - started
+    return wall, union_seconds(llm_intervals), sum(end - start for start, end in llm_intervals)
+
+
+def percentile(values: list, q: float) -> float:
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[int(q) - 1]
+
+
+def report(
+    name: str,
+    node_times: dict,
+    walls: list,
+    llm_times: list,
+    llm_summed: list,
+    timer: CheckpointTimer,
+    memory: dict,
+):
+    print(f"\n== {name}: {len(walls)} queries ==")
+    print(f"{'node':<32}{'calls':>7}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'total ms':>11}")
+    for node, times in sorted(node_times.items(), key=lambda item: -sum(item[1])):
+        print(
+            f"{node:<32}{len(times):>7}{statistics.mean(times) * 1000:>10.1f}"
+            f"{percentile(times, 50) * 1000:>10.1f}{percentile(times, 95) * 1000:>10.1f}"
+            f"{sum(times) * 1000:>11.1f}"
+        )
+    total_wall = sum(walls)
+    total_llm = sum(llm_times)
+    overheads = [wall - llm for wall, llm in zip(walls, llm_times)]
+    print(
+        f"query wall: mean {statistics.mean(walls) * 1000:.1f} ms, "
+        f"p95 {percentile(walls, 95) * 1000:.1f} ms"
+    )
+    # llm calls of parallel branches overlap, only time with no call running is overhead
+    print(
+        f"llm time: {total_llm * 1000:.1f} ms with a call running "
+        f"({sum(llm_summed) * 1000:.1f} ms summed over calls)"
+    )
+    print(
+        f"framework overhead (wall minus llm): {(total_wall - total_llm) * 1000:.1f} ms total, "
+        f"mean {statistics.mean(overheads) * 1000:.1f} ms, "
+        f"p95 {percentile(overheads, 95) * 1000:.1f} ms per query"
+    )
+    checkpoint_total = sum(timer.seconds.values())
+    print(
+        f"checkpointer: {checkpoint_total * 1000:.1f} ms total "
+        f"({checkpoint_total / total_wall:.1%} of wall)"
+    )
+    for method in CHECKPOINTER_METHODS:
+        if timer.calls[method]:
+            print(
+                f"  {method:<12}{timer.calls[method]:>6} calls"
+                f"{timer.seconds[method] / timer.calls[method] * 1000:>9.2f} ms/call"
+            )
+    print("memory: " + ", ".join(f"{key} {value:.1f} MB" for key, value in memory.items()))
+
+
+async def bench_checkpointer(name: str, checkpointer, args, base_config: dict):
+    timer = CheckpointTimer(checkpointer)
+    graph = build_graph(checkpointer=checkpointer)
+    # warm-up run: imports, client creation, table setup are not measured
+    await run_query(
+        graph,
+        QUERIES[0],
+        RunnableConfig(configurable={**base_config, "thread_id": "warmup"}),
+        defaultdict(list),
+    )
+    timer.reset()
+
+    node_times = defaultdict(list)
+    walls, llm_times, llm_summed = [], [], []
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    if args.tracemalloc:
+        tracemalloc.start()
+    for i in range(args.iterations):
+        # each iteration is one conversation, queries of the iteration share the thread
+        thread_id = f"bench-{uuid.uuid4()}"
+        config = RunnableConfig(configurable={**base_config, "thread_id": thread_id})
+        for query in QUERIES:
+            wall, llm, summed = await run_query(graph, query, config, node_times)
+            walls.append(wall)
+            llm_times.append(llm)
+            llm_summed.append(summed)
+    memory = {
+        "peak rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "peak rss growth": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 - rss_before,
+    }
+    if args.tracemalloc:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        memory["tracemalloc peak"] = peak / 1024 / 1024
+    report(name, node_times, walls, llm_times, llm_summed, timer, memory)
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark graph overhead against the stub llm server"
+    )
+    parser.add_argument("--iterations", type=int, default=5, help="conversations per checkpointer")
+    parser.add_argument("--checkpointer", choices=["memory", "postgres", "both"], default="both")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument(
+        "--token-delay", type=float, default=0.0, help="stub seconds per generated token"
+    )
+    parser.add_argument(
+        "--first-token-delay", type=float, default=0.0, help="stub seconds before first token"
+    )
+    parser.add_argument("--response-tokens", type=int, default=64)
+    parser.add_argument(
+        "--tracemalloc", action="store_true", help="also report python heap peak (slows the run)"
+    )
+    args = parser.parse_args()
+
+    server = start_in_thread(
+        StubSettings(args.token_delay, args.first_token_delay, args.response_tokens), port=args.port
+    )
+    base_config = {
+        "llm_api_base": f"http://127.0.0.1:{args.port}/v1",
+        "llm_api_key": "stub",
+        "model": "stub",
+    }
+    try:
+        if args.checkpointer in ("memory", "both"):
+            await bench_checkpointer("MemorySaver", MemorySaver(), args, base_config)
+        if args.checkpointer in ("postgres", "both"):
+            if not os.getenv("DATABASE_URL"):
+                print("\nDATABASE_URL is not set, skipping postgres checkpointer")
+            else:
+                await warm_up_pool()
+                async with shared_pool_checkpointer() as checkpointer:
+                    await checkpointer.setup()
+                    await init_db()
+                    await bench_checkpointer(
+                        "AsyncPostgresSaver", checkpointer, args, {**base_config, "use_db": True}
+                    )
+    finally:
+        await aclose_llm_clients()
+        await dispose_engine()
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+"""Query latency of the offline paper index on a synthetic arXiv dump.
+
+Generates papers with a zipf-like vocabulary (a few very common terms, a long tail of
+rare ones), builds the index in a temporary directory and times BM25 search:
+
+    python -m benchmarks.bench_paper_index --docs 300000
+
+--python also times the plain python scoring loop that is used without numpy.
+"""
+import argparse
+import json
+import random
+import statistics
+import tempfile
+import time
+from itertools import accumulate
+from pathlib import Path
+from typing import List
+
+from src.tools import paper_index
+from src.tools.paper_index import PaperIndex, build_index
+
+
+# words of the benchmark queries are common, but below PAPER_INDEX_MAX_DF_RATIO
+TOPIC_WORDS = [
+    "neural", "code", "summarization", "large", "language", "model", "generation",
+    "retrieval", "graph", "program", "repair", "transformer", "learning", "benchmark",
+]
+QUERIES = [
+    "neural code summarization",
+    "large language model for code generation",
+    "graph neural networks for program repair",
+    "retrieval augmented transformer benchmark",
+]
+
+
+def _vocabulary(size: int) -> List[str]:
+    rng = random.Random(0)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = {"".join(rng.choices(letters, k=rng.randint(4, 10))) for _ in range(size)}
+    return sorted(words)
+
+
+def write_dump(path: Path, num_docs: int, seed: int = 0) -> Path:
+    rng = random.Random(seed)
+    vocabulary = _vocabulary(30000)
+    # zipf-like weights, word i is drawn with probability ~ 1 / (i + 10)
+    cum_weights = list(accumulate(1 / (i + 10) for i in range(len(vocabulary))))
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(num_docs):
+            topic = rng.sample(TOPIC_WORDS, 3)
+            title = topic + rng.choices(vocabulary, cum_weights=cum_weights, k=6)
+            abstract = rng.choices(TOPIC_WORDS, k=4)
+            abstract += rng.choices(vocabulary, cum_weights=cum_weights, k=80)
+            rng.shuffle(abstract)
+            f.write(json.dumps({
+                "id": f"{2000 + i // 100000}.{i % 100000:05d}",
+                "title": " ".join(title),
+                "abstract": " ".join(abstract),
+                "categories": "cs.SE",
+            }) + "\n")
+    return path
+
+
+def build_synthetic_index(index_dir: Path, num_docs: int, segment_docs: int) -> PaperIndex:
+    dump = write_dump(Path(index_dir) / "dump.jsonl", num_docs)
+    build_index([dump], index_dir, segment_docs=segment_docs)
+    return PaperIndex(index_dir)
+
+
+def time_queries(index: PaperIndex, repeats: int) -> dict:
+    timings = {}
+    for query in QUERIES:
+        index.search(query)
+        samples = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            index.search(query)
+            samples.append(time.perf_counter() - started)
+        timings[query] = statistics.median(samples)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure paper index query latency")
+    parser.add_argument("--docs", type=int, default=300000)
+    parser.add_argument("--segment-docs", type=int, default=paper_index.PAPER_INDEX_SEGMENT_DOCS)
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--python", action="store_true", help="also time the numpy-less loop")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_paper_index_") as index_dir:
+        started = time.perf_counter()
+        index = build_synthetic_index(Path(index_dir), args.docs, args.segment_docs)
+        print(
+            f"built {index.num_docs} docs in {len(index.segments)} segments "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+        variants = [("numpy", paper_index.np)]
+        if args.python:
+            variants.append(("python", None))
+        numpy_module = paper_index.np
+        for name, module in variants:
+            paper_index.np = module
+            try:
+                timings = time_queries(index, args.repeats)
+            finally:
+                paper_index.np = numpy_module
+            for query, seconds in timings.items():
+                print(f"{name:<8}{query:<48}{seconds * 1000:>9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
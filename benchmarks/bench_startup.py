@@ -0,0 +1,139 @@
+"""Import time and cold start of the entrypoints, with tracing off and on.
+
+Every sample runs in a fresh interpreter, so module caches of earlier runs do not
+hide regressions. For each entrypoint it measures
+
+- import: `import backend.app` / `import main`
+- cold start: import plus what happens before the first request can be served
+  (app lifespan startup for the backend, tracing setup and build_graph for the cli)
+
+and, with --top, which top level packages take the most import time according to
+`python -X importtime`:
+
+    python -m benchmarks.bench_startup --repeats 5 --top 15
+
+DATABASE_URL is cleared in the children, so the numbers do not include postgres.
+Tracing runs have no collector to talk to, spans are not exported during startup anyway.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+
+ENTRYPOINTS = ("backend.app", "main")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def _start_backend(module) -> None:
+    async with module.lifespan(module.app):
+        pass
+
+
+def _start_cli(module) -> None:
+    module.setup_tracing()
+    module.build_graph(checkpointer=module.MemorySaver())
+
+
+def run_child(entrypoint: str) -> None:
+    # executed in the fresh interpreter, prints timings as json
+    started = time.perf_counter()
+    module = __import__(entrypoint, fromlist=["_"])
+    imported = time.perf_counter()
+    if entrypoint == "backend.app":
+        asyncio.run(_start_backend(module))
+    else:
+        _start_cli(module)
+    ready = time.perf_counter()
+    print(json.dumps({"import": imported - started, "cold_start": ready - started}))
+
+
+def child_env(tracing: bool) -> dict:
+    # empty values are kept by load_dotenv, so .env cannot switch them back
+    return {**os.environ, "DATABASE_URL": "", "TRACING_ENABLED": "true" if tracing else "false"}
+
+
+def sample(entrypoint: str, tracing: bool) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_startup", "--child", entrypoint],
+        cwd=ROOT, env=child_env(tracing), capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def import_profile(entrypoint: str, tracing: bool, top: int) -> list[tuple[str, float]]:
+    # sums self time of all modules per top level package
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {entrypoint}"],
+        cwd=ROOT, env=child_env(tracing), capture_output=True, text=True, check=True,
+    )
+    per_package = defaultdict(float)
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        per_package[name.strip().split(".")[0]] += int(self_us) / 1e6
+    return sorted(per_package.items(), key=lambda item: -item[1])[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure import time and cold start of the entrypoints"
+    )
+    parser.add_argument(
+        "--repeats", type=int, default=5, help="fresh interpreters per configuration"
+    )
+    parser.add_argument("--entrypoint", choices=[*ENTRYPOINTS, "all"], default="all")
+    parser.add_argument(
+        "--top", type=int, default=0, help="also show the N slowest packages to import"
+    )
+    parser.add_argument("--json-out", help="also write the medians to this file")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child)
+        return
+
+    entrypoints = ENTRYPOINTS if args.entrypoint == "all" else (args.entrypoint,)
+    summary = {}
+    print(
+        f"{'entrypoint':<14}{'tracing':>9}{'import ms':>12}{'cold start ms':>16}{'min cold ms':>14}"
+    )
+    for entrypoint in entrypoints:
+        for tracing in (False, True):
+            samples = [sample(entrypoint, tracing) for _ in range(args.repeats)]
+            imports = [s["import"] for s in samples]
+            cold = [s["cold_start"] for s in samples]
+            key = f"{entrypoint}/{'tracing' if tracing else 'no_tracing'}"
+            summary[key] = {
+                "import_ms": statistics.median(imports) * 1000,
+                "cold_start_ms": statistics.median(cold) * 1000,
+                "min_cold_start_ms": min(cold) * 1000,
+            }
+            print(
+                f"{entrypoint:<14}{'on' if tracing else 'off':>9}{summary[key]['import_ms']:>12.0f}"
+                f"{summary[key]['cold_start_ms']:>16.0f}{summary[key]['min_cold_start_ms']:>14.0f}"
+            )
+
+    if args.top:
+        for entrypoint in entrypoints:
+            for tracing in (False, True):
+                print(
+                    f"\n== slowest imports of {entrypoint}, tracing {'on' if tracing else 'off'} =="
+                )
+                for package, seconds in import_profile(entrypoint, tracing, args.top):
+                    print(f"{package:<36}{seconds * 1000:>10.1f} ms")
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
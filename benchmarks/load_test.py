@@ -0,0 +1,197 @@
+"""Replays a JSONL workload against the backend /chat endpoint and reports latency.
+
+Every line is a JSON object, the query is taken from "message" (falling back to
+"query", then "title" + "body"), an optional "thread_id" is respected. Requests are
+spread over --threads conversations. With --rate requests arrive as a poisson process
+(open loop, latency includes waiting for a free --concurrency slot), without it
+--concurrency workers send requests back to back (closed loop).
+
+Capacity planning without a real model:
+
+    python -m benchmarks.stub_llm_server --port 8089 --token-delay 0.005
+    OPENAI_API_BASE=http://127.0.0.1:8089/v1 OPENAI_API_KEY=stub MODEL=stub \\
+        uvicorn backend.app:app --workers 4
+    python -m benchmarks.load_test requests.jsonl --concurrency 32 --rate 20 --requests 500
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import httpx
+
+
+@dataclass
+class Result:
+    latency: float
+    wait: float
+    error: Optional[str]
+
+
+@dataclass
+class LoadStats:
+    results: List[Result] = field(default_factory=list)
+    started: float = 0.0
+    finished: float = 0.0
+
+
+def load_workload(path: str) -> List[dict]:
+    workload = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            message = item.get("message") or item.get("query")
+            if not message:
+                message = "\n\n".join(
+                    part for part in (item.get("title"), item.get("body")) if part
+                )
+            if message:
+                workload.append({"message": message, "thread_id": item.get("thread_id")})
+    if not workload:
+        raise ValueError(f"no requests found in {path}")
+    return workload
+
+
+def percentile(values: List[float], q: float) -> float:
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[int(q) - 1]
+
+
+async def send(client: httpx.AsyncClient, url: str, payload: dict, scheduled: float) -> Result:
+    sent = time.perf_counter()
+    try:
+        response = await client.post(url, json=payload)
+        error = None if response.status_code == 200 else f"HTTP {response.status_code}"
+    except httpx.HTTPError as exc:
+        error = type(exc).__name__
+    finished = time.perf_counter()
+    return Result(latency=finished - scheduled, wait=sent - scheduled, error=error)
+
+
+async def run_load(args, workload: List[dict]) -> LoadStats:
+    run_id = uuid.uuid4().hex[:8]
+    url = args.url.rstrip("/") + "/chat"
+    stats = LoadStats()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    limits = httpx.Limits(
+        max_connections=args.concurrency, max_keepalive_connections=args.concurrency
+    )
+
+    def payload(i: int) -> dict:
+        item = workload[i % len(workload)]
+        thread_id = item["thread_id"] or f"load-{run_id}-{i % args.threads}"
+        return {"message": item["message"], "thread_id": thread_id}
+
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        stats.started = time.perf_counter()
+        if args.rate > 0:
+            async def timed(i: int, scheduled: float) -> None:
+                async with semaphore:
+                    stats.results.append(await send(client, url, payload(i), scheduled))
+
+            tasks = []
+            next_arrival = time.perf_counter()
+            for i in range(args.requests):
+                delay = next_arrival - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                tasks.append(asyncio.create_task(timed(i, next_arrival)))
+                next_arrival += random.expovariate(args.rate)
+            await asyncio.gather(*tasks)
+        else:
+            counter = iter(range(args.requests))
+
+            async def worker() -> None:
+                for i in counter:
+                    stats.results.append(await send(client, url, payload(i), time.perf_counter()))
+
+            await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        stats.finished = time.perf_counter()
+    return stats
+
+
+def report(stats: LoadStats, args) -> dict:
+    elapsed = stats.finished - stats.started
+    ok = [r.latency for r in stats.results if r.error is None]
+    errors = Counter(r.error for r in stats.results if r.error is not None)
+    summary = {
+        "requests": len(stats.results),
+        "ok": len(ok),
+        "error_rate": (len(stats.results) - len(ok)) / len(stats.results),
+        "errors": dict(errors),
+        "elapsed_seconds": elapsed,
+        "throughput_rps": len(ok) / elapsed if elapsed else 0.0,
+        "concurrency": args.concurrency,
+        "rate": args.rate,
+        "threads": args.threads,
+    }
+    if ok:
+        summary["latency_ms"] = {
+            "p50": percentile(ok, 50) * 1000,
+            "p95": percentile(ok, 95) * 1000,
+            "p99": percentile(ok, 99) * 1000,
+            "max": max(ok) * 1000,
+            "mean": statistics.mean(ok) * 1000,
+        }
+        summary["queue_wait_ms_mean"] = statistics.mean(r.wait for r in stats.results) * 1000
+
+    print(
+        f"{summary['requests']} requests in {elapsed:.1f}s, "
+        f"{summary['throughput_rps']:.2f} ok req/s"
+    )
+    print(f"errors: {summary['error_rate']:.2%}" + (f" {dict(errors)}" if errors else ""))
+    if ok:
+        latency = summary["latency_ms"]
+        print(
+            f"latency ms: p50 {latency['p50']:.0f}, p95 {latency['p95']:.0f}, "
+            f"p99 {latency['p99']:.0f}, "
+            f"max {latency['max']:.0f} (mean queue wait {summary['queue_wait_ms_mean']:.0f})"
+        )
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a JSONL workload against /chat")
+    parser.add_argument("workload", help="JSONL file with one request per line")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=8, help="max requests in flight")
+    parser.add_argument(
+        "--rate", type=float, default=0.0, help="arrivals per second, 0 sends back to back"
+    )
+    parser.add_argument(
+        "--requests", type=int, default=0, help="total requests, defaults to workload size"
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=64,
+        help="number of conversations (thread_ids) to spread over",
+    )
+    parser.add_argument("--timeout", type=float, default=600.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json-out", help="also write the summary to this file")
+    args = parser.parse_args()
+
+    workload = load_workload(args.workload)
+    args.requests = args.requests or len(workload)
+    args.threads = max(args.threads, 1)
+    random.seed(args.seed)
+    stats = asyncio.run(run_load(args, workload))
+    summary = report(stats, args)
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
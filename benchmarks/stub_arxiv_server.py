@@ -0,0 +1,116 @@
+"""Stand-in for the arXiv query API serving Atom feeds with made up papers.
+
+Every query gets --results papers whose titles repeat the query, queries containing
+"nothing" get an empty feed. Request times are recorded, so tests can check the
+spacing enforced by the rate limiter. Run standalone:
+
+    python -m benchmarks.stub_arxiv_server --port 8081
+
+and point the app to it with ARXIV_API_URL="http://127.0.0.1:8081/api/query?{}".
+"""
+import argparse
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import escape
+
+
+FEED_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom"
+      xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/"
+      xmlns:arxiv="http://arxiv.org/schemas/atom">
+  <title>arXiv Query: {query}</title>
+  <id>http://arxiv.org/api/stub</id>
+  <updated>2024-01-01T00:00:00-05:00</updated>
+  <opensearch:totalResults>{total}</opensearch:totalResults>
+  <opensearch:startIndex>{start}</opensearch:startIndex>
+  <opensearch:itemsPerPage>{per_page}</opensearch:itemsPerPage>
+{entries}</feed>
+"""
+
+ENTRY_TEMPLATE = """  <entry>
+    <id>http://arxiv.org/abs/2401.{number:05d}v1</id>
+    <updated>2024-01-01T00:00:00Z</updated>
+    <published>2024-01-01T00:00:00Z</published>
+    <title>{title}</title>
+    <summary>Stub abstract number {number} about {query}.</summary>
+    <author><name>Stub Author</name></author>
+    <link href="http://arxiv.org/abs/2401.{number:05d}v1" rel="alternate" type="text/html"/>
+    <link title="pdf" href="http://arxiv.org/pdf/2401.{number:05d}v1" rel="related"
+          type="application/pdf"/>
+    <arxiv:primary_category term="cs.CL" scheme="http://arxiv.org/schemas/atom"/>
+    <category term="cs.CL" scheme="http://arxiv.org/schemas/atom"/>
+  </entry>
+"""
+
+
+def render_feed(query: str, start: int, max_results: int, total: int) -> str:
+    numbers = range(start + 1, min(start + max_results, total) + 1)
+    entries = "".join(
+        ENTRY_TEMPLATE.format(number=n, title=escape(f"{query} part {n}"), query=escape(query))
+        for n in numbers
+    )
+    return FEED_TEMPLATE.format(
+        query=escape(query), total=total, start=start, per_page=len(numbers), entries=entries
+    )
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "StubArxivServer"
+
+    def do_GET(self):
+        self.server.request_times.append(time.monotonic())
+        params = parse_qs(urlparse(self.path).query)
+        query = params.get("search_query", [""])[0]
+        start = int(params.get("start", ["0"])[0])
+        max_results = int(params.get("max_results", ["10"])[0])
+        self.server.queries.append(query)
+        total = 0 if "nothing" in query.lower() else self.server.results
+        body = render_feed(query, start, max_results, total).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/atom+xml; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubArxivServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8081, results: int = 2):
+        super().__init__((host, port), _Handler)
+        self.results = results
+        self.request_times: List[float] = []
+        self.queries: List[str] = []
+
+    @property
+    def query_url_format(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/api/query?{{}}"
+
+
+def start_in_thread(host: str = "127.0.0.1", port: int = 0, results: int = 2) -> StubArxivServer:
+    # port 0 picks a free one, see server.query_url_format. stop with server.shutdown()
+    server = StubArxivServer(host, port, results)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in arXiv query API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--results", type=int, default=2, help="papers returned per query")
+    args = parser.parse_args()
+    server = StubArxivServer(args.host, args.port, args.results)
+    print(f"ARXIV_API_URL={server.query_url_format}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
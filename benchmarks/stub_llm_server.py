@@ -0,0 +1,196 @@
+"""OpenAI-compatible stub of the chat completions API with scripted answers.
+
+Responses are picked from the tools offered in the request, so every node of the
+graph gets a plausible answer without a real model:
+
+- supervisor (call_coder / call_researcher offered): calls call_coder when the user
+  query mentions code or a file, call_researcher when it mentions papers, both otherwise;
+  answers with text once the tool results are in
+- devlead (call_code_reader offered): reads --read-file once, then answers
+- researcher (search_local_papers offered): searches the local paper index once, then answers
+- everything else (code reader, summaries, history compaction): plain text
+
+Run standalone:
+
+    python -m benchmarks.stub_llm_server --port 8089 --token-delay 0.01
+
+and point the app to it with OPENAI_API_BASE=http://127.0.0.1:8089/v1.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import threading
+import time
+from dataclasses import dataclass
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+WORDS = (
+    "the module wires the supervisor graph with coder and researcher subagents and keeps "
+    "summaries of files in long term memory so repeated questions are cheaper"
+).split()
+
+
+@dataclass
+class StubSettings:
+    token_delay: float = 0.0
+    first_token_delay: float = 0.0
+    response_tokens: int = 64
+    read_file: str = "main.py"
+
+
+def last_user_turn(messages: list) -> tuple[str, list]:
+    # text of the last user message and messages after it
+    for i in range(len(messages) - 1, -1, -1):
+        if messages[i].get("role") == "user":
+            content = messages[i].get("content")
+            if isinstance(content, list):
+                content = " ".join(
+                    part.get("text", "") for part in content if isinstance(part, dict)
+                )
+            return str(content or ""), messages[i + 1:]
+    return "", messages
+
+
+def script_tool_calls(request: dict, settings: StubSettings) -> list[tuple[str, dict]]:
+    tool_names = {tool["function"]["name"] for tool in request.get("tools") or []}
+    query, after_user = last_user_turn(request.get("messages", []))
+    if any(message.get("role") == "tool" for message in after_user):
+        return []
+    if {"call_coder", "call_researcher"} & tool_names:
+        lowered = query.lower()
+        wants_code = "code" in lowered or "file" in lowered
+        wants_papers = "paper" in lowered
+        calls = []
+        if wants_code or not wants_papers:
+            calls.append(("call_coder", {"task": query}))
+        if wants_papers or not wants_code:
+            calls.append(("call_researcher", {"task": query}))
+        return calls
+    if "call_code_reader" in tool_names:
+        return [("call_code_reader", {"filepath": settings.read_file})]
+    if "search_local_papers" in tool_names:
+        return [("search_local_papers", {"query": query[:200], "max_results": 3})]
+    return []
+
+
+def create_app(settings: StubSettings) -> FastAPI:
+    app = FastAPI()
+    call_ids = itertools.count()
+
+    def usage(completion_tokens: int) -> dict:
+        return {
+            "prompt_tokens": 0,
+            "completion_tokens": completion_tokens,
+            "total_tokens": completion_tokens,
+        }
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        model = body.get("model", "stub")
+        completion_id = f"chatcmpl-stub-{next(call_ids)}"
+        created = int(time.time())
+        tool_calls = [
+            {
+                "id": f"call_{completion_id}_{i}",
+                "type": "function",
+                "function": {"name": name, "arguments": json.dumps(args)},
+            }
+            for i, (name, args) in enumerate(script_tool_calls(body, settings))
+        ]
+        tokens = [] if tool_calls else [
+            WORDS[i % len(WORDS)] + " " for i in range(settings.response_tokens)
+        ]
+        num_tokens = len(tokens) or len(tool_calls)
+
+        if not body.get("stream"):
+            await asyncio.sleep(settings.first_token_delay + settings.token_delay * num_tokens)
+            message = {"role": "assistant", "content": "".join(tokens) or None}
+            if tool_calls:
+                message["tool_calls"] = tool_calls
+            return JSONResponse({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": message,
+                    "finish_reason": "tool_calls" if tool_calls else "stop",
+                }],
+                "usage": usage(num_tokens),
+            })
+
+        def chunk(delta: dict, finish_reason=None, with_usage=False) -> str:
+            data = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            if with_usage:
+                data["usage"] = usage(num_tokens)
+            return f"data: {json.dumps(data)}\n\n"
+
+        async def stream():
+            await asyncio.sleep(settings.first_token_delay)
+            yield chunk({"role": "assistant", "content": ""})
+            for token in tokens:
+                await asyncio.sleep(settings.token_delay)
+                yield chunk({"content": token})
+            for i, tool_call in enumerate(tool_calls):
+                await asyncio.sleep(settings.token_delay)
+                yield chunk({"tool_calls": [{"index": i, **tool_call}]})
+            yield chunk({}, "tool_calls" if tool_calls else "stop", with_usage=True)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    return app
+
+
+def start_in_thread(
+    settings: StubSettings, host: str = "127.0.0.1", port: int = 8089
+) -> uvicorn.Server:
+    # own thread and event loop, so the stub does not compete with the measured graph
+    server = uvicorn.Server(
+        uvicorn.Config(create_app(settings), host=host, port=port, log_level="warning")
+    )
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError(f"stub llm server failed to start on {host}:{port}")
+        time.sleep(0.05)
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stub llm server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument(
+        "--token-delay", type=float, default=0.0, help="seconds per generated token"
+    )
+    parser.add_argument(
+        "--first-token-delay", type=float, default=0.0, help="seconds before the first token"
+    )
+    parser.add_argument("--response-tokens", type=int, default=64, help="length of text answers")
+    parser.add_argument(
+        "--read-file", default="main.py", help="file the devlead asks the code reader for"
+    )
+    args = parser.parse_args()
+    settings = StubSettings(
+        args.token_delay, args.first_token_delay, args.response_tokens, args.read_file
+    )
+    uvicorn.run(create_app(settings), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,25 +5,15 @@ from dotenv import load_dotenv
 from langchain_core.messages import AIMessage, HumanMessage
 from langchain_core.runnables import RunnableConfig
 from langgraph.checkpoint.memory import MemorySaver
-from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
-from openinference.instrumentation.langchain import LangChainInstrumentor
-from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
-from phoenix.otel import register
 
 from src.agent.graph import build_graph
-from src.agent.state import AgentState
-from src.database import init_db
+from src.agent.utils import aclose_llm_clients
+from src.database import dispose_engine, init_db, shared_pool_checkpointer, warm_up_pool
+from src.tools import shutdown_code_search, warm_up_symbol_index
+from src.tracing import setup_tracing, shutdown_tracing
 
 load_dotenv()
 
-tracer_provider = register(
-    project_name="aboba",
-    auto_instrument=False,
-)
-LangChainInstrumentor().instrument(tracer_provider=tracer_provider)
-HTTPXClientInstrumentor().instrument()
-tracer = tracer_provider.get_tracer("aboba")
-
 
 # async cli app is not really needed
 # but i made in that way for compatability with fastapi app
@@ -43,14 +33,8 @@ async def run_chat_loop(app, config):
             continue
         if user_input.lower() in {"exit", "quit"}:
             break
-        existing_state = await app.aget_state(config=config)
-        messages = existing_state.values.get("messages", [])
-        input_state = {
-            **existing_state.values,
-            "messages": messages,
-            "user_query": user_input,
-        }
-        result = await app.ainvoke(AgentState(**input_state), config=config)
+        # only the new query is sent, the rest of the state comes from checkpointer
+        result = await app.ainvoke({"user_query": user_input}, config=config)
         messages = result.get("messages", [])
         last_message = messages[-1]
         if not isinstance(last_message, AIMessage):
@@ -73,6 +57,8 @@ async def run_chat_loop(app, config):
 
 async def main() -> None:
     database_url = os.getenv("DATABASE_URL")
+    setup_tracing()
+    symbol_index_task = asyncio.create_task(warm_up_symbol_index())
     config = RunnableConfig(
         configurable={
             "thread_id": "main_thread",
@@ -82,23 +68,30 @@ async def main() -> None:
         }
     )
     
-    if database_url:
-        try:
-            db_url_for_checkpoint = database_url.replace("postgresql+psycopg://", "postgresql://")
-            async with AsyncPostgresSaver.from_conn_string(db_url_for_checkpoint) as checkpointer:
-                await checkpointer.setup()
-                await init_db()
+    # cleanup runs on ctrl-c and errors too: queued spans are flushed, process pool is shut down
+    try:
+        if database_url:
+            try:
+                await warm_up_pool()
+                async with shared_pool_checkpointer() as checkpointer:
+                    await checkpointer.setup()
+                    await init_db()
+                    app = build_graph(checkpointer=checkpointer)
+                    await run_chat_loop(app, config)
+            except Exception as e:
+                checkpointer = MemorySaver()
                 app = build_graph(checkpointer=checkpointer)
                 await run_chat_loop(app, config)
-        except Exception as e:
+        else:
             checkpointer = MemorySaver()
             app = build_graph(checkpointer=checkpointer)
             await run_chat_loop(app, config)
-    else:
-        checkpointer = MemorySaver()
-        app = build_graph(checkpointer=checkpointer)
-        await run_chat_loop(app, config)
-    
+    finally:
+        symbol_index_task.cancel()
+        shutdown_code_search()
+        await aclose_llm_clients()
+        await dispose_engine()
+        shutdown_tracing()
     print("Goodbye.")
 
 
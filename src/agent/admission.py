@@ -0,0 +1,96 @@
+import asyncio
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from langchain_openai import ChatOpenAI
+
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "64"))
+LLM_QUEUE_TIMEOUT_SECONDS = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "30"))
+# weight of the newest call in the moving average used for retry-after hints
+LLM_DURATION_SMOOTHING = 0.2
+
+
+class LLMCapacityError(RuntimeError):
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+# process-wide admission control of llm calls. at most max_concurrency calls hit the
+# model server, up to max_queue more wait for a slot, everything above is rejected
+# right away instead of piling up and raising tail latency for everyone
+class LLMLimiter:
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._avg_duration = 1.0
+
+    def saturated(self) -> bool:
+        return self.in_flight >= self.max_concurrency and self.waiting >= self.max_queue
+
+    def retry_after(self) -> int:
+        # time until the current queue drains, assuming calls of average length
+        return max(1, math.ceil(self._avg_duration * (self.waiting + 1) / self.max_concurrency))
+
+    def _reject(self, reason: str) -> LLMCapacityError:
+        self.rejected += 1
+        return LLMCapacityError(f"LLM capacity exhausted: {reason}", self.retry_after())
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            raise self._reject(f"{self.waiting} calls already waiting")
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise self._reject(f"no free slot within {self.queue_timeout:g}s") from None
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+            duration = time.perf_counter() - started
+            self._avg_duration += LLM_DURATION_SMOOTHING * (duration - self._avg_duration)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+        }
+
+
+llm_limiter = LLMLimiter(LLM_MAX_CONCURRENCY, LLM_MAX_QUEUE, LLM_QUEUE_TIMEOUT_SECONDS)
+
+
+# only requests that reach the model server take a slot, cache hits are answered
+# before _agenerate / _astream are called. streams hold the slot until the last chunk
+class LimitedChatOpenAI(ChatOpenAI):
+    async def _agenerate(self, *args, **kwargs):
+        if self.streaming:
+            # goes through _astream, which takes the slot itself
+            return await super()._agenerate(*args, **kwargs)
+        async with llm_limiter.slot():
+            return await super()._agenerate(*args, **kwargs)
+
+    async def _astream(self, *args, **kwargs):
+        async with llm_limiter.slot():
+            async for chunk in super()._astream(*args, **kwargs):
+                yield chunk
@@ -0,0 +1,100 @@
+import hashlib
+import os
+import re
+from typing import List
+
+
+# rough estimate, good enough to decide on chunking without pulling a tokenizer
+CHARS_PER_TOKEN = 4
+CODE_READER_CHUNK_TOKENS = int(os.getenv("CODE_READER_CHUNK_TOKENS", "6000"))
+
+# unindented lines which start a new top-level definition in common languages
+_TOP_LEVEL_DEFINITION = re.compile(
+    r"^(?:@|(?:async\s+)?def\s|class\s|(?:export\s+)?(?:default\s+)?(?:async\s+)?function\b|"
+    r"export\s|(?:public|private|protected|internal|static|abstract|final)\s|"
+    r"func\s|fn\s|pub\s|impl\b|struct\s|enum\s|interface\s|trait\s|type\s|"
+    r"const\s|let\s|var\s|module\s|namespace\s|template\s*<)"
+)
+_DECORATOR = re.compile(r"^@")
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def split_top_level(text: str) -> List[str]:
+    # splits text into segments each starting at a top-level definition,
+    # decorators stay attached to the definition they decorate
+    segments = []
+    current = []
+    after_decorator = False
+    for line in text.splitlines(keepends=True):
+        is_boundary = bool(_TOP_LEVEL_DEFINITION.match(line))
+        if is_boundary and current and not after_decorator:
+            segments.append("".join(current))
+            current = []
+        current.append(line)
+        if line.strip():
+            after_decorator = bool(_DECORATOR.match(line))
+    if current:
+        segments.append("".join(current))
+    return segments
+
+
+def _split_by_lines(segment: str, max_chars: int) -> List[str]:
+    pieces = []
+    current = ""
+    for line in segment.splitlines(keepends=True):
+        if current and len(current) + len(line) > max_chars:
+            pieces.append(current)
+            current = ""
+        # single huge line (minified code), cut it as is
+        while len(line) > max_chars:
+            pieces.append(line[:max_chars])
+            line = line[max_chars:]
+        current += line
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _closes_chunk(segment: str, target_chars: int) -> bool:
+    # hash of the definition line, not the body, so editing a function does not move
+    # borders. chance grows with segment size (rounded to a power of two, so usual
+    # edits do not flip it), a border falls about every target_chars on average
+    header = next(
+        (line for line in segment.splitlines() if line.strip() and not _DECORATOR.match(line)),
+        segment,
+    )
+    value = int.from_bytes(hashlib.blake2b(header.encode(), digest_size=4).digest(), "big")
+    size_bucket = 1 << max(len(segment).bit_length() - 1, 0)
+    return value < (1 << 32) * size_bucket / target_chars
+
+
+def chunk_text(text: str, max_tokens: int = CODE_READER_CHUNK_TOKENS) -> List[str]:
+    # packs top-level segments into chunks of at most max_tokens with content-defined
+    # borders: a chunk is closed after a segment picked by its own hash, not when the
+    # previous chunks happen to fill up. so an edit which changes the size of one
+    # definition changes only its chunk and chunk summaries of the rest stay in memory
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    target_chars = max_chars // 2
+    min_chars = max_chars // 8
+    chunks = []
+    current = ""
+    for segment in split_top_level(text):
+        if len(segment) > max_chars:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.extend(_split_by_lines(segment, max_chars))
+            continue
+        if current and len(current) + len(segment) > max_chars:
+            chunks.append(current)
+            current = ""
+        current += segment
+        if len(current) >= min_chars and _closes_chunk(segment, target_chars):
+            chunks.append(current)
+            current = ""
+    if current:
+        chunks.append(current)
+    return chunks
@@ -1,3 +1,5 @@
+import asyncio
+import os
 import re
 from typing import Optional
 
@@ -9,35 +11,57 @@ from langchain_core.messages import (
     get_buffer_string,
 )
 from langchain_core.runnables import RunnableConfig
-from langchain_openai import ChatOpenAI
 from langgraph.graph import END, StateGraph
 from langgraph.prebuilt import ToolNode
 
-from src.prompts.code_reader import code_reader_system_prompt, code_reader_user_prompt
+from src.prompts.code_reader import (
+    code_reader_chunk_system_prompt,
+    code_reader_chunk_user_prompt,
+    code_reader_reduce_system_prompt,
+    code_reader_reduce_user_prompt,
+    code_reader_system_prompt,
+    code_reader_user_prompt,
+)
 from src.prompts.devlead import devlead_system_prompt, devlead_user_prompt
 from src.tools import (
     call_code_reader,
+    find_symbol,
     get_file_history,
     get_git_history,
+    get_symbol_source,
     list_directory,
     memorize_file_summary,
     read_file_content,
-    recall_file_summary,
+    recall_file_summaries,
+    resolve_project_file,
+    search_code,
 )
 
+from .admission import LLMCapacityError
+from .chunking import CODE_READER_CHUNK_TOKENS, chunk_text, estimate_tokens
 from .state import CoderState
+from .utils import get_llm
+
+
+DEVLEAD_TOOLS = [
+    get_git_history,
+    get_file_history,
+    call_code_reader,
+    list_directory,
+    search_code,
+    find_symbol,
+    get_symbol_source,
+    read_file_content,
+]
+CODE_READER_CONCURRENCY = int(os.getenv("CODE_READER_CONCURRENCY", "4"))
+# chunk summaries are stored in the same long term memory as file summaries,
+# prefix keeps them apart from a summary of a whole file with identical content
+CHUNK_MEMORY_PREFIX = "chunk:"
 
 
 async def devlead_node(state: CoderState, config: Optional[RunnableConfig] = None) -> dict:
     configurable = (config or {}).get("configurable", {})
-    api_base = configurable.get("llm_api_base")
-    api_key = configurable.get("llm_api_key")
-    model_name = configurable.get("model", "qwen")
-    model = ChatOpenAI(model=model_name, temperature=0, base_url=api_base, api_key=api_key)
-    model_with_tools = model.bind_tools(
-        [get_git_history, get_file_history, call_code_reader, list_directory],
-        strict=True
-    )
+    model_with_tools = get_llm(configurable, tools=DEVLEAD_TOOLS, node="devlead")
     
     messages = state.get("messages", [])
     user_query = state.get("user_query") or ""
@@ -57,63 +81,166 @@ async def devlead_node(state: CoderState, config: Optional[RunnableConfig] = Non
     return result
 
 
+async def summarize_file(target: str, content: str, model, use_db: Optional[bool]) -> str:
+    if estimate_tokens(content) > CODE_READER_CHUNK_TOKENS:
+        summary = await summarize_chunked(target, content, model, use_db)
+        await memorize_file_summary(content, summary, use_db=use_db)
+        return summary
+    
+    all_messages = [
+        SystemMessage(content=code_reader_system_prompt),
+        HumanMessage(content=code_reader_user_prompt(target, content)),
+    ]
+    
+    response = await model.ainvoke(all_messages)
+    
+    if isinstance(response.content, str):
+        await memorize_file_summary(content, response.content, use_db=use_db)
+    
+    return response.content
+
+
+# map-reduce for files which dont fit into a single prompt: chunks split on top-level
+# definitions are summarized concurrently, then combined by one reduce call.
+# chunk summaries are memorized by chunk content, so after an edit only changed chunks
+# are summarized again
+async def summarize_chunked(target: str, content: str, model, use_db: Optional[bool]) -> str:
+    chunks = chunk_text(content)
+    memory_keys = [CHUNK_MEMORY_PREFIX + chunk for chunk in chunks]
+    cached_summaries = await recall_file_summaries(memory_keys, use_db=use_db)
+    semaphore = asyncio.Semaphore(CODE_READER_CONCURRENCY)
+    
+    async def summarize_chunk(index: int, chunk: str) -> str:
+        memory_key = memory_keys[index - 1]
+        cached_summary = cached_summaries[index - 1]
+        if cached_summary:
+            return cached_summary
+        async with semaphore:
+            response = await model.ainvoke([
+                SystemMessage(content=code_reader_chunk_system_prompt),
+                HumanMessage(content=code_reader_chunk_user_prompt(target, index, len(chunks), chunk)),
+            ])
+        summary = str(response.content)
+        await memorize_file_summary(memory_key, summary, use_db=use_db)
+        return summary
+    
+    chunk_summaries = await asyncio.gather(
+        *(summarize_chunk(i, chunk) for i, chunk in enumerate(chunks, start=1))
+    )
+    response = await model.ainvoke([
+        SystemMessage(content=code_reader_reduce_system_prompt),
+        HumanMessage(content=code_reader_reduce_user_prompt(target, list(chunk_summaries))),
+    ])
+    return str(response.content)
+
+
+async def read_target(target: str) -> tuple[Optional[str], Optional[str]]:
+    # (content, None) or (None, error for the devlead). errors must not reach the summarizer
+    # or long term memory, a summary of "File not found." would be recalled for every bad path
+    path = resolve_project_file(target)
+    if isinstance(path, str):
+        return None, path
+    try:
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, path.read_text), None
+    except UnicodeDecodeError:
+        return None, "Unable to read file as text."
+    except OSError as exc:
+        return None, f"Unable to read file: {exc.strerror or exc}"
+
+
 async def code_reader_node(state: CoderState, config: Optional[RunnableConfig] = None) -> dict:
     configurable = (config or {}).get("configurable", {})
-    api_base = configurable.get("llm_api_base")
-    api_key = configurable.get("llm_api_key")
-    model_name = configurable.get("model", "qwen")
     use_db = configurable.get("use_db")
-    model = ChatOpenAI(model=model_name, temperature=0, base_url=api_base, api_key=api_key)
+    model = get_llm(configurable, node="code_reader")
     
-    target = None
-    tool_call_id = None
+    # devlead may request several files in one turn, every call_code_reader call
+    # is answered with its own tool message, files are read and summarized concurrently
+    reader_calls = []
+    other_calls = []
     messages = state.get("messages", [])
     if messages:
         last_message = messages[-1]
         if isinstance(last_message, AIMessage) and last_message.tool_calls:
             for tool_call in last_message.tool_calls:
                 if tool_call.get("name") == "call_code_reader":
-                    args = tool_call.get("args", {})
-                    target = args.get("filepath")
-                    tool_call_id = tool_call.get("id")
-                    break
+                    reader_calls.append(tool_call)
+                else:
+                    other_calls.append(tool_call)
     
-    if not target:
+    if not reader_calls:
         query = state.get("user_query", "")
         match = re.search(r"[\w./-]+\.[A-Za-z0-9]+", query)
-        target = match.group(0) if match else None
+        reader_calls.append({"args": {"filepath": match.group(0) if match else None}, "id": ""})
     
-    content = await read_file_content.ainvoke({"filepath": target}) if target else "No file provided."
+    targets = list(dict.fromkeys(
+        target for target in (tool_call.get("args", {}).get("filepath") for tool_call in reader_calls) if target
+    ))
+    reads = dict(zip(targets, await asyncio.gather(*(read_target(target) for target in targets))))
+    contents_by_target = {
+        target: content for target, (content, _) in reads.items() if content is not None
+    }
+    # memory lookup for all successfully read files in one round-trip
+    cached_summaries = dict(zip(
+        contents_by_target,
+        await recall_file_summaries(list(contents_by_target.values()), use_db=use_db),
+    ))
+    semaphore = asyncio.Semaphore(CODE_READER_CONCURRENCY)
     
-    cached_summary = None
-    if target:
-        cached_summary = await recall_file_summary(content, use_db=use_db)
-    if cached_summary:
-        return {
-            "messages": [ToolMessage(content=f"[From memory] {cached_summary}", tool_call_id=tool_call_id or "")],
-        }
+    async def read_one(tool_call: dict) -> ToolMessage:
+        target = tool_call.get("args", {}).get("filepath")
+        tool_call_id = tool_call.get("id") or ""
+        if not target:
+            return ToolMessage(content="No file provided.", tool_call_id=tool_call_id)
+        error = reads[target][1]
+        if error is not None:
+            return ToolMessage(
+                content=f"{target}: {error}", tool_call_id=tool_call_id, status="error"
+            )
+        if cached_summaries.get(target):
+            return ToolMessage(content=f"[From memory] {cached_summaries[target]}", tool_call_id=tool_call_id)
+        try:
+            async with semaphore:
+                summary = await summarize_file(target, contents_by_target[target], model, use_db)
+        except LLMCapacityError:
+            raise
+        except Exception as exc:
+            return ToolMessage(
+                content=f"Unable to summarize {target}: {exc}",
+                tool_call_id=tool_call_id,
+                status="error",
+            )
+        return ToolMessage(content=summary, tool_call_id=tool_call_id)
     
-    all_messages = [
-        SystemMessage(content=code_reader_system_prompt),
-        HumanMessage(content=code_reader_user_prompt(target or "", content)),
-    ]
+    # other tools requested in the same turn still need their tool messages,
+    # otherwise next devlead call is rejected by the llm api
+    tools_by_name = {t.name: t for t in DEVLEAD_TOOLS}
     
-    response = await model.ainvoke(all_messages)
+    async def run_other(tool_call: dict) -> ToolMessage:
+        name = tool_call.get("name")
+        tool_call_id = tool_call.get("id") or ""
+        tool = tools_by_name.get(name)
+        if tool is None:
+            return ToolMessage(content=f"Unknown tool: {name}", name=name, tool_call_id=tool_call_id, status="error")
+        try:
+            return await tool.ainvoke({**tool_call, "type": "tool_call"})
+        except LLMCapacityError:
+            raise
+        except Exception as exc:
+            # same as ToolNode, a failing tool is reported to the model instead of failing the turn
+            return ToolMessage(content=f"{name} failed: {exc}", name=name, tool_call_id=tool_call_id, status="error")
     
-    if target and isinstance(response.content, str):
-        await memorize_file_summary(content, response.content, use_db=use_db)
+    results = await asyncio.gather(
+        *(read_one(tool_call) for tool_call in reader_calls),
+        *(run_other(tool_call) for tool_call in other_calls),
+    )
     
-    return {
-        "messages": [ToolMessage(content=response.content, tool_call_id=tool_call_id or "")],
-    }
+    return {"messages": list(results)}
 
 
 async def summarize_code_node(state: CoderState, config: Optional[RunnableConfig] = None) -> dict:
     configurable = (config or {}).get("configurable", {})
-    api_base = configurable.get("llm_api_base")
-    api_key = configurable.get("llm_api_key")
-    model_name = configurable.get("model", "qwen")
-    model = ChatOpenAI(model=model_name, temperature=0, base_url=api_base, api_key=api_key)
+    model = get_llm(configurable, node="summarize_code")
     
     messages = state.get("messages", [])
     conversation = get_buffer_string(messages)
@@ -144,7 +271,7 @@ def should_continue_devlead(state: CoderState) -> str:
 def build_coding_agent_subgraph():
     subgraph = StateGraph(CoderState)
     subgraph.add_node("devlead", devlead_node)
-    subgraph.add_node("tools", ToolNode([get_git_history, get_file_history, call_code_reader, list_directory]))
+    subgraph.add_node("tools", ToolNode(DEVLEAD_TOOLS))
     subgraph.add_node("code_reader", code_reader_node)
     subgraph.add_node("summarize", summarize_code_node)
     subgraph.set_entry_point("devlead")
@@ -1,10 +1,16 @@
+import asyncio
+import os
+from typing import List, Optional
+
 from langgraph.graph import END, StateGraph
-from langgraph.prebuilt import ToolNode
-from langchain_core.messages import AIMessage
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import BaseTool
 
+from .admission import LLMCapacityError
 from .devlead import build_coding_agent_subgraph
 from .researcher import build_researcher_subgraph
-from .supervisor import build_supervisor, prepare_user_input, postprocess_tools
+from .supervisor import build_supervisor, compact_history, prepare_user_input, postprocess_tools
 from .subagent_wrappers import build_subagent_wrappers
 from .state import AgentState
 
@@ -20,6 +26,54 @@ def route_from_supervisor(state: AgentState) -> str:
     return END
 
 
+SUBAGENT_TIMEOUT_SECONDS = float(os.getenv("SUBAGENT_TIMEOUT_SECONDS", "300"))
+
+
+def build_supervisor_fanout(subagents: List[BaseTool], timeout: float = SUBAGENT_TIMEOUT_SECONDS):
+    # fan-out stage: every subagent call of a supervisor turn runs concurrently,
+    # each branch under its own timeout, so a mixed paper + implementation turn
+    # takes max(branch) instead of sum(branch). fan-in happens in postprocess_tools
+    subagents_by_name = {subagent.name: subagent for subagent in subagents}
+
+    async def run_branch(tool_call: dict, config: Optional[RunnableConfig]) -> ToolMessage:
+        name = tool_call["name"]
+        subagent = subagents_by_name.get(name)
+        if subagent is None:
+            return ToolMessage(
+                content=f"Unknown tool: {name}", name=name, tool_call_id=tool_call["id"], status="error"
+            )
+        try:
+            return await asyncio.wait_for(
+                subagent.ainvoke({**tool_call, "type": "tool_call"}, config=config),
+                timeout=timeout,
+            )
+        except LLMCapacityError:
+            # overloaded model server fails the whole request, not just this branch
+            raise
+        except asyncio.TimeoutError:
+            return ToolMessage(
+                content=f"{name} did not finish within {timeout:.0f}s",
+                name=name,
+                tool_call_id=tool_call["id"],
+                status="error",
+            )
+        except Exception as exc:
+            return ToolMessage(
+                content=f"{name} failed: {exc}", name=name, tool_call_id=tool_call["id"], status="error"
+            )
+
+    async def supervisor_fanout(state: AgentState, config: Optional[RunnableConfig] = None) -> dict:
+        last_message = state.get("messages", [])[-1]
+        if not isinstance(last_message, AIMessage) or not last_message.tool_calls:
+            return {}
+        results = await asyncio.gather(
+            *(run_branch(tool_call, config) for tool_call in last_message.tool_calls)
+        )
+        return {"messages": list(results)}
+
+    return supervisor_fanout
+
+
 def build_graph(checkpointer=None):
     graph = StateGraph(AgentState)
 
@@ -34,12 +88,14 @@ def build_graph(checkpointer=None):
 
     graph.add_node("prepare_user_input", prepare_user_input)
     graph.add_node("Supervisor", supervisor)
-    graph.add_node("supervisor_routing", ToolNode(supervisor_tools))
+    graph.add_node("supervisor_routing", build_supervisor_fanout(supervisor_tools))
     graph.add_node("supervisor_tool_postproc", postprocess_tools)
+    graph.add_node("compact_history", compact_history)
     graph.set_entry_point("prepare_user_input")
     graph.add_conditional_edges("Supervisor", route_from_supervisor)
     graph.add_edge("supervisor_routing", "supervisor_tool_postproc")
-    graph.add_edge("supervisor_tool_postproc", "Supervisor")
-    graph.add_edge("prepare_user_input", "Supervisor")
+    graph.add_edge("supervisor_tool_postproc", "compact_history")
+    graph.add_edge("prepare_user_input", "compact_history")
+    graph.add_edge("compact_history", "Supervisor")
     
     return graph.compile(checkpointer=checkpointer)
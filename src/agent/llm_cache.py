@@ -0,0 +1,160 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Optional, Sequence
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+from src.database import evict_llm_responses, fetch_llm_response, upload_llm_response
+
+
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+LLM_CACHE_DIR = Path(os.getenv("LONG_TERM_MEMORY_DIR", ".cache/agent_memory")) / "llm"
+# eviction runs once per this many writes instead of on every one
+LLM_CACHE_EVICT_EVERY = 100
+# differ between otherwise identical histories (ids, token usage, fingerprints)
+VOLATILE_MESSAGE_FIELDS = {"id", "response_metadata", "usage_metadata"}
+
+
+def cache_enabled_for(node: Optional[str]) -> bool:
+    # comma separated node names, e.g. "devlead,summarize_code,summarize_research"
+    nodes = {n.strip() for n in os.getenv("LLM_CACHE_NODES", "").split(",") if n.strip()}
+    return node is not None and (node in nodes or "*" in nodes)
+
+
+def _strip_volatile(obj: Any) -> Any:
+    if isinstance(obj, dict):
+        if obj.get("type") == "constructor" and isinstance(obj.get("kwargs"), dict):
+            kwargs = {
+                k: _strip_volatile(v)
+                for k, v in obj["kwargs"].items()
+                if k not in VOLATILE_MESSAGE_FIELDS
+            }
+            return {**obj, "kwargs": kwargs}
+        return {k: _strip_volatile(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_strip_volatile(v) for v in obj]
+    return obj
+
+
+def get_cache_key(prompt: str, llm_string: str) -> str:
+    # prompt is langchain dump of the messages, llm_string holds model, params and bound tools
+    try:
+        normalized = json.dumps(_strip_volatile(json.loads(prompt)), sort_keys=True)
+    except ValueError:
+        normalized = prompt
+    return hashlib.sha256(f"{llm_string}\0{normalized}".encode()).hexdigest()
+
+
+def _read_local_response(cache_key: str) -> Optional[str]:
+    cache_file = LLM_CACHE_DIR / f"{cache_key}.json"
+    if not cache_file.exists():
+        return None
+    entry = json.loads(cache_file.read_text())
+    if time.time() - entry["created_at"] > LLM_CACHE_TTL_SECONDS:
+        return None
+    return entry["generations"]
+
+
+def _write_local_response(cache_key: str, generations: str) -> None:
+    LLM_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    cache_file = LLM_CACHE_DIR / f"{cache_key}.json"
+    cache_file.write_text(json.dumps({"generations": generations, "created_at": time.time()}))
+
+
+def _evict_local_responses() -> int:
+    files = []
+    for cache_file in LLM_CACHE_DIR.glob("*.json"):
+        try:
+            files.append((cache_file.stat().st_mtime, cache_file))
+        except OSError:
+            continue
+    files.sort(reverse=True)
+    oldest = time.time() - LLM_CACHE_TTL_SECONDS
+    evicted = 0
+    for i, (mtime, cache_file) in enumerate(files):
+        if i >= LLM_CACHE_MAX_ENTRIES or mtime < oldest:
+            cache_file.unlink(missing_ok=True)
+            evicted += 1
+    return evicted
+
+
+# exact-match cache of chat model responses. generations are stored as langchain
+# dumps, so AIMessage tool_calls survive the round-trip. storage follows long term
+# memory: postgres table when DATABASE_URL is set, local json files otherwise.
+# the backend is async only, sync lookups (not used by the graph) always miss on db
+class LLMResponseCache(BaseCache):
+    def __init__(self, use_db: bool):
+        self.use_db = use_db
+        self._writes = 0
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        if self.use_db:
+            return None
+        return self._decode(_read_local_response(get_cache_key(prompt, llm_string)))
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        if not self.use_db:
+            _write_local_response(get_cache_key(prompt, llm_string), dumps(list(return_val)))
+
+    def clear(self, **kwargs: Any) -> None:
+        if not self.use_db:
+            for cache_file in LLM_CACHE_DIR.glob("*.json"):
+                cache_file.unlink(missing_ok=True)
+
+    @staticmethod
+    def _decode(generations: Optional[str]) -> Optional[Sequence]:
+        if generations is None:
+            return None
+        return loads(generations)
+
+    async def alookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        cache_key = get_cache_key(prompt, llm_string)
+        try:
+            if self.use_db:
+                generations = await fetch_llm_response(cache_key, LLM_CACHE_TTL_SECONDS)
+            else:
+                loop = asyncio.get_event_loop()
+                generations = await loop.run_in_executor(None, _read_local_response, cache_key)
+            return self._decode(generations)
+        except Exception:
+            # broken cache must never fail the llm call
+            return None
+
+    async def aupdate(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        cache_key = get_cache_key(prompt, llm_string)
+        generations = dumps(list(return_val))
+        self._writes += 1
+        evict = self._writes % LLM_CACHE_EVICT_EVERY == 0
+        try:
+            if self.use_db:
+                await upload_llm_response(cache_key, generations)
+                if evict:
+                    await evict_llm_responses(LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL_SECONDS)
+            else:
+                loop = asyncio.get_event_loop()
+                await loop.run_in_executor(None, _write_local_response, cache_key, generations)
+                if evict:
+                    await loop.run_in_executor(None, _evict_local_responses)
+        except Exception:
+            pass
+
+    async def aclear(self, **kwargs: Any) -> None:
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self.clear)
+
+
+_llm_caches: dict[bool, LLMResponseCache] = {}
+
+
+def get_llm_cache(use_db: bool) -> LLMResponseCache:
+    cache = _llm_caches.get(use_db)
+    if cache is None:
+        cache = LLMResponseCache(use_db)
+        _llm_caches[use_db] = cache
+    return cache
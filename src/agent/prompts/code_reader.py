@@ -3,3 +3,18 @@ code_reader_system_prompt = "You are a code summarizer. You receive a file path.
 
 def code_reader_user_prompt(filepath: str, file_content: str) -> str:
     return f"Path: {filepath}\n\n{file_content}"
+
+
+code_reader_chunk_system_prompt = "You are a code summarizer. You receive one part of a large file. Give a concise summary of the definitions in this part: what they do, their inputs/outputs and notable dependencies."
+
+
+def code_reader_chunk_user_prompt(filepath: str, index: int, total: int, chunk: str) -> str:
+    return f"Path: {filepath} (part {index} of {total})\n\n{chunk}"
+
+
+code_reader_reduce_system_prompt = "You are a code summarizer. You receive summaries of consecutive parts of one large file. Combine them into a single concise summary of what the whole file does."
+
+
+def code_reader_reduce_user_prompt(filepath: str, chunk_summaries: list[str]) -> str:
+    parts = "\n\n".join(f"Part {i}:\n{summary}" for i, summary in enumerate(chunk_summaries, start=1))
+    return f"Path: {filepath}\n\n{parts}"
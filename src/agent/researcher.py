@@ -1,13 +1,16 @@
 from typing import Optional
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, get_buffer_string
 from langchain_core.runnables import RunnableConfig
-from langchain_openai import ChatOpenAI
 from langgraph.graph import END, StateGraph
 from langgraph.prebuilt import ToolNode
 
 from .prompts.researcher import researcher_system_prompt, researcher_user_prompt
 from .state import ResearcherState
-from src.tools import search_arxiv
+from .utils import get_llm
+from src.tools import search_arxiv, search_local_papers
+
+
+RESEARCHER_TOOLS = [search_local_papers, search_arxiv]
 
 
 def should_continue_research(state: ResearcherState) -> str:
@@ -22,14 +25,7 @@ def should_continue_research(state: ResearcherState) -> str:
 
 async def researcher_agent_node(state: ResearcherState, config: Optional[RunnableConfig] = None) -> dict:
     configurable = (config or {}).get("configurable", {})
-    api_base = configurable.get("llm_api_base")
-    api_key = configurable.get("llm_api_key")
-    model_name = configurable.get("model", "qwen")
-    model = ChatOpenAI(model=model_name, temperature=0, base_url=api_base, api_key=api_key)
-    model_with_tools = model.bind_tools(
-        [search_arxiv],
-        strict=True
-    )
+    model_with_tools = get_llm(configurable, tools=RESEARCHER_TOOLS, node="researcher")
     
     messages = state.get("messages", [])
     user_query = state.get("user_query") or ""
@@ -51,10 +47,7 @@ async def researcher_agent_node(state: ResearcherState, config: Optional[Runnabl
 
 async def summarize_research_node(state: ResearcherState, config: Optional[RunnableConfig] = None) -> dict:
     configurable = (config or {}).get("configurable", {})
-    api_base = configurable.get("llm_api_base")
-    api_key = configurable.get("llm_api_key")
-    model_name = configurable.get("model", "qwen")
-    model = ChatOpenAI(model=model_name, temperature=0, base_url=api_base, api_key=api_key)
+    model = get_llm(configurable, node="summarize_research")
     
     messages = state.get("messages", [])
     conversation = get_buffer_string(messages)
@@ -72,7 +65,7 @@ async def summarize_research_node(state: ResearcherState, config: Optional[Runna
 def build_researcher_subgraph():
     subgraph = StateGraph(ResearcherState)
     subgraph.add_node("researcher", researcher_agent_node)
-    subgraph.add_node("tools", ToolNode([search_arxiv]))
+    subgraph.add_node("tools", ToolNode(RESEARCHER_TOOLS))
     subgraph.add_node("summarize", summarize_research_node)
     subgraph.set_entry_point("researcher")
     subgraph.add_conditional_edges("researcher", should_continue_research)
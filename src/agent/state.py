@@ -12,6 +12,8 @@ class AgentState(TypedDict):
     research_context: Optional[str]
     code_context: Optional[str]
     num_iterations: int
+    # rolling summary of turns removed from messages by history compaction
+    history_summary: Optional[str]
 
 # creating separate states in order to handle them
 # as sepearate subgraphs where messages field is a history of only specific agent
@@ -1,13 +1,31 @@
+import os
 from typing import Optional, List
-from langchain_core.messages import HumanMessage, SystemMessage, ToolMessage
+from langchain_core.messages import (
+    BaseMessage,
+    HumanMessage,
+    RemoveMessage,
+    SystemMessage,
+    ToolMessage,
+    get_buffer_string,
+)
+from langchain_core.messages.utils import count_tokens_approximately
 from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import BaseTool
 
-from .prompts.supervisor import supervisor_system_prompt, supervisor_user_prompt
-from .utils import create_llm, normalize_message_content
+from .prompts.supervisor import (
+    history_summary_system_prompt,
+    history_summary_user_prompt,
+    supervisor_history_prompt,
+    supervisor_system_prompt,
+    supervisor_user_prompt,
+)
+from .utils import get_llm, normalize_message_content
 from .state import AgentState
 
 
+HISTORY_KEEP_TURNS = int(os.getenv("HISTORY_KEEP_TURNS", "4"))
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "24000"))
+
 # purely programmatic node
 # to preprocess user input and add it to state
 # removing this logic from supervisor node itself
@@ -17,17 +35,14 @@ async def prepare_user_input(state: AgentState, config: Optional[RunnableConfig]
     research_context = state.get("research_context") or ""
     code_context = state.get("code_context") or ""
     user_content = supervisor_user_prompt(query, research_context, code_context)
-    return {"messages": [HumanMessage(content=user_content)]}
+    # iteration limit is per user request, the counter itself lives in checkpointed state
+    return {"messages": [HumanMessage(content=user_content)], "num_iterations": 0}
     
 
 
 async def supervisor_node(state: AgentState, subagents: List[BaseTool], config: Optional[RunnableConfig] = None) -> dict:
     configurable = (config or {}).get("configurable", {})
-    api_base = configurable.get("llm_api_base", None)
-    api_key = configurable.get("llm_api_key", None)
-    model_name = configurable.get("model", "qwen")
-    llm = create_llm(model=model_name, temperature=0, base_url=api_base, api_key=api_key)
-    llm = llm.bind_tools(subagents, strict=True)
+    llm = get_llm(configurable, tools=subagents, node="supervisor")
     
     state_messages = state.get("messages") or []
     
@@ -35,8 +50,14 @@ async def supervisor_node(state: AgentState, subagents: List[BaseTool], config:
     #normalized_messages = [normalize_message_content(msg) for msg in state_messages]
     normalized_messages = state.get("messages", [])
     
+    system_prompt = supervisor_system_prompt
+    history_summary = state.get("history_summary")
+    if history_summary:
+        # kept inside single system message, some chat templates accept system role only first
+        system_prompt += supervisor_history_prompt(history_summary)
+    
     response = await llm.ainvoke(
-        [SystemMessage(content=supervisor_system_prompt)] + normalized_messages
+        [SystemMessage(content=system_prompt)] + normalized_messages
     )
     
     return {
@@ -44,19 +65,77 @@ async def supervisor_node(state: AgentState, subagents: List[BaseTool], config:
         "num_iterations": state.get("num_iterations", 0) + 1
     }
 
-async def postprocess_tools(state: AgentState) -> dict:
-    last_message = state.get("messages", [])[-1]
-    if not isinstance(last_message, ToolMessage):
+def split_turns(messages: List[BaseMessage]) -> List[List[BaseMessage]]:
+    # turn starts with user's human message and holds all supervisor / tool messages
+    # after it, so folding whole turns never separates tool calls from tool results
+    turns = []
+    for message in messages:
+        if isinstance(message, HumanMessage) or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+# runs before every supervisor call: newest HISTORY_KEEP_TURNS turns stay verbatim,
+# older ones are folded into rolling history_summary and removed from messages.
+# if kept turns still exceed HISTORY_TOKEN_BUDGET, more turns are folded (current turn never is).
+# result goes through checkpointer, so compaction is done once, not on every request
+async def compact_history(state: AgentState, config: Optional[RunnableConfig] = None) -> dict:
+    turns = split_turns(state.get("messages") or [])
+    history_summary = state.get("history_summary") or ""
+    
+    num_folded = max(0, len(turns) - max(1, HISTORY_KEEP_TURNS))
+    budget = HISTORY_TOKEN_BUDGET - count_tokens_approximately([SystemMessage(content=history_summary)])
+    while num_folded < len(turns) - 1:
+        kept = [message for turn in turns[num_folded:] for message in turn]
+        if count_tokens_approximately(kept) <= budget:
+            break
+        num_folded += 1
+    if num_folded == 0:
         return {}
     
-    if last_message.name == "call_coder":
-        return {"code_context": last_message.content}
+    folded = [message for turn in turns[:num_folded] for message in turn]
+    configurable = (config or {}).get("configurable", {})
+    llm = get_llm(configurable, node="compact_history")
+    response = await llm.ainvoke([
+        SystemMessage(content=history_summary_system_prompt),
+        HumanMessage(content=history_summary_user_prompt(history_summary, get_buffer_string(folded))),
+    ])
+    
+    return {
+        "history_summary": str(response.content),
+        "messages": [RemoveMessage(id=message.id) for message in folded],
+    }
 
-    if last_message.name == "call_researcher":
-        return {"research_context": last_message.content}
 
-    return {}
-    
+# fan-in of supervisor_routing: all tool messages of the last supervisor turn
+# are merged into shared contexts, not only the last one
+async def postprocess_tools(state: AgentState) -> dict:
+    tool_messages = []
+    for message in reversed(state.get("messages", [])):
+        if not isinstance(message, ToolMessage):
+            break
+        tool_messages.append(message)
+    tool_messages.reverse()
+
+    code_contexts = []
+    research_contexts = []
+    for message in tool_messages:
+        # failed or timed out branches stay in history for supervisor,
+        # but must not overwrite shared contexts
+        if message.status == "error":
+            continue
+        if message.name == "call_coder":
+            code_contexts.append(str(message.content))
+        elif message.name == "call_researcher":
+            research_contexts.append(str(message.content))
+
+    update = {}
+    if code_contexts:
+        update["code_context"] = "\n\n".join(code_contexts)
+    if research_contexts:
+        update["research_context"] = "\n\n".join(research_contexts)
+    return update
 
 
 def build_supervisor(subagents: List[BaseTool]):
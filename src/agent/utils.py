@@ -1,12 +1,17 @@
+import os
 import re
 import json
-from typing import TypeVar, Type, Any, Generic
+from typing import TypeVar, Type, Any, Generic, Optional, Sequence
+import httpx
 from pydantic import BaseModel, ValidationError
-from langchain_openai import ChatOpenAI
 from langchain_core.runnables import Runnable
+from langchain_core.tools import BaseTool
 from langchain_core.output_parsers import PydanticOutputParser
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, BaseMessage
 
+from .admission import LLMCapacityError, LimitedChatOpenAI
+from .llm_cache import cache_enabled_for, get_llm_cache
+
 T = TypeVar('T', bound=BaseModel)
 
 def create_llm(reasoning=False, **kwargs):
@@ -19,7 +24,69 @@ def create_llm(reasoning=False, **kwargs):
     #else:
     #    conf = {"reasoning": {"enabled": False, "effort": "low"}}
     conf = {}
-    return ChatOpenAI(**kwargs | conf, max_retries=3)
+    return LimitedChatOpenAI(**kwargs | conf, max_retries=3)
+
+
+# process-wide registry of llm clients, so nodes dont pay for new http client,
+# tls handshake and tool schema conversion on every call
+# all clients share one keep-alive connection pool
+_http_client: Optional[httpx.AsyncClient] = None
+_llm_registry: dict[tuple, Runnable] = {}
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        limits = httpx.Limits(
+            max_connections=int(os.getenv("LLM_POOL_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(os.getenv("LLM_POOL_MAX_KEEPALIVE", "20")),
+            keepalive_expiry=float(os.getenv("LLM_POOL_KEEPALIVE_EXPIRY", "30")),
+        )
+        _http_client = httpx.AsyncClient(limits=limits)
+    return _http_client
+
+
+def get_llm(
+    configurable: dict,
+    tools: Optional[Sequence[BaseTool]] = None,
+    node: Optional[str] = None,
+    **kwargs,
+) -> Runnable:
+    api_base = configurable.get("llm_api_base")
+    api_key = configurable.get("llm_api_key")
+    model_name = configurable.get("model", "qwen")
+    kwargs.setdefault("temperature", 0)
+    # response cache is opt-in per node through LLM_CACHE_NODES
+    cache = None
+    if cache_enabled_for(node):
+        use_db = configurable.get("use_db")
+        cache = get_llm_cache(bool(os.getenv("DATABASE_URL")) if use_db is None else use_db)
+    # tools are identified by name, bound schemas are the same for the same names
+    tool_names = tuple(t.name for t in tools) if tools else ()
+    key = (api_base, api_key, model_name, tool_names, tuple(sorted(kwargs.items())), id(cache))
+    llm = _llm_registry.get(key)
+    if llm is None:
+        if cache is not None:
+            kwargs["cache"] = cache
+        llm = create_llm(
+            model=model_name,
+            base_url=api_base,
+            api_key=api_key,
+            http_async_client=get_http_client(),
+            **kwargs,
+        )
+        if tools:
+            llm = llm.bind_tools(tools, strict=True)
+        _llm_registry[key] = llm
+    return llm
+
+
+async def aclose_llm_clients() -> None:
+    global _http_client
+    _llm_registry.clear()
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
 
 def normalize_message_content(msg: BaseMessage) -> BaseMessage:
     if isinstance(msg.content, list):
@@ -131,6 +198,8 @@ class StructuredRetryRunnable(Runnable, Generic[T]):
                     cleaned_text = clean_response(raw_text)
                     parsed = parse_with_retry(self.model_class, cleaned_text)
                     return parsed
+            except LLMCapacityError:
+                raise
             except Exception as e:
                 print(f"exception: {e}")
                 pass
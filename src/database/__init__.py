@@ -1,18 +1,52 @@
-from .models import FileSummary, init_db
+from .arxiv_cache import fetch_arxiv_results, upload_arxiv_results
+from .checkpoint_retention import (
+    CHECKPOINT_RETENTION_INTERVAL_SECONDS,
+    prune_checkpoints,
+    run_checkpoint_retention,
+)
+from .checkpointer import shared_pool_checkpointer
+from .llm_cache import evict_llm_responses, fetch_llm_response, upload_llm_response
+from .models import (
+    ArxivQueryCache,
+    FileSummary,
+    LLMCacheEntry,
+    dispose_engine,
+    get_pool_stats,
+    init_db,
+    warm_up_pool,
+)
 from .summary_storage import (
+    fetch_summaries,
     fetch_summary,
     fetch_summary_by_filepath,
     get_content_hash,
     list_all_summaries,
+    upload_summaries,
     upload_summary,
 )
 
 __all__ = [
+    "ArxivQueryCache",
+    "CHECKPOINT_RETENTION_INTERVAL_SECONDS",
     "FileSummary",
+    "LLMCacheEntry",
+    "dispose_engine",
+    "evict_llm_responses",
+    "fetch_arxiv_results",
+    "fetch_llm_response",
+    "fetch_summaries",
     "fetch_summary",
     "fetch_summary_by_filepath",
     "get_content_hash",
+    "get_pool_stats",
     "init_db",
     "list_all_summaries",
+    "prune_checkpoints",
+    "run_checkpoint_retention",
+    "shared_pool_checkpointer",
+    "upload_arxiv_results",
+    "upload_llm_response",
+    "upload_summaries",
     "upload_summary",
+    "warm_up_pool",
 ]
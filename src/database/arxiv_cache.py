@@ -0,0 +1,33 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+from .models import ArxivQueryCache, get_async_session
+
+
+async def fetch_arxiv_results(query_key: str, ttl_seconds: float) -> Optional[str]:
+    oldest = datetime.utcnow() - timedelta(seconds=ttl_seconds)
+    async with get_async_session() as session:
+        result = await session.execute(
+            select(ArxivQueryCache.results).filter(
+                ArxivQueryCache.query_key == query_key,
+                ArxivQueryCache.created_at >= oldest,
+            )
+        )
+        return result.scalar_one_or_none()
+
+
+async def upload_arxiv_results(query_key: str, query: str, results: str) -> None:
+    now = datetime.utcnow()
+    statement = insert(ArxivQueryCache).values(
+        query_key=query_key, query=query, results=results, created_at=now
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[ArxivQueryCache.query_key],
+        set_={"results": statement.excluded.results, "created_at": statement.excluded.created_at},
+    )
+    async with get_async_session() as session:
+        await session.execute(statement)
+        await session.commit()
@@ -0,0 +1,202 @@
+import argparse
+import asyncio
+import os
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+
+from .models import dispose_engine, get_async_engine
+
+
+CHECKPOINT_KEEP_LAST = int(os.getenv("CHECKPOINT_KEEP_LAST", "20"))
+CHECKPOINT_THREAD_TTL_DAYS = float(os.getenv("CHECKPOINT_THREAD_TTL_DAYS", "30"))
+# 0 disables periodic retention inside the fastapi app
+CHECKPOINT_RETENTION_INTERVAL_SECONDS = float(
+    os.getenv("CHECKPOINT_RETENTION_INTERVAL_SECONDS", "0")
+)
+
+# tables are the ones created by AsyncPostgresSaver.setup()
+_IDLE_THREADS_SQL = text("""
+    SELECT thread_id FROM checkpoints
+    GROUP BY thread_id
+    HAVING max((checkpoint ->> 'ts')::timestamptz) < now() - make_interval(secs => :ttl_seconds)
+""")
+
+_DELETE_THREADS_SQL = {
+    table: text(f"""
+        WITH deleted AS (
+            DELETE FROM {table} t WHERE t.thread_id = ANY(:thread_ids)
+            RETURNING pg_column_size(t.*) AS size
+        )
+        SELECT count(*), coalesce(sum(size), 0) FROM deleted
+    """)
+    for table in ("checkpoint_writes", "checkpoint_blobs", "checkpoints")
+}
+
+# latest checkpoints are found by checkpoint_id, ids are uuid6 and sort by creation time.
+# only root namespace ('') is ranked: subgraphs of call_coder / call_researcher run in a
+# new namespace per task with a handful of checkpoints each, so ranking per namespace
+# would never prune them. rows of any namespace older than the oldest kept root
+# checkpoint go, fully pruned subgraph namespaces are reported for blob cleanup
+_DELETE_OLD_CHECKPOINTS_SQL = text("""
+    WITH ranked AS (
+        SELECT thread_id, checkpoint_id,
+               row_number() OVER (PARTITION BY thread_id ORDER BY checkpoint_id DESC) AS rn
+        FROM checkpoints
+        WHERE checkpoint_ns = ''
+    ), cutoff AS (
+        SELECT thread_id, min(checkpoint_id) AS min_checkpoint_id
+        FROM ranked WHERE rn <= :keep_last GROUP BY thread_id
+    ), deleted AS (
+        DELETE FROM checkpoints c USING cutoff k
+        WHERE c.thread_id = k.thread_id AND c.checkpoint_id < k.min_checkpoint_id
+        RETURNING c.thread_id, c.checkpoint_ns, pg_column_size(c.*) AS size
+    ), pruned AS (
+        SELECT DISTINCT d.thread_id, d.checkpoint_ns FROM deleted d
+        WHERE d.checkpoint_ns <> '' AND NOT EXISTS (
+            SELECT 1 FROM checkpoints c
+            WHERE c.thread_id = d.thread_id AND c.checkpoint_ns = d.checkpoint_ns
+              AND c.checkpoint_id >= (
+                  SELECT min_checkpoint_id FROM cutoff k WHERE k.thread_id = d.thread_id
+              )
+        )
+    )
+    SELECT (SELECT count(*) FROM deleted),
+           (SELECT coalesce(sum(size), 0) FROM deleted),
+           (SELECT coalesce(array_agg(thread_id ORDER BY thread_id, checkpoint_ns), '{}')
+            FROM pruned),
+           (SELECT coalesce(array_agg(checkpoint_ns ORDER BY thread_id, checkpoint_ns), '{}')
+            FROM pruned)
+""")
+
+# writes are only removed below the oldest kept root checkpoint of the thread, so rows
+# written concurrently by a running graph or subgraph (always newer) are never touched
+_DELETE_OLD_WRITES_SQL = text("""
+    WITH kept AS (
+        SELECT thread_id, min(checkpoint_id) AS min_checkpoint_id
+        FROM checkpoints WHERE checkpoint_ns = '' GROUP BY thread_id
+    ), deleted AS (
+        DELETE FROM checkpoint_writes w USING kept k
+        WHERE w.thread_id = k.thread_id AND w.checkpoint_id < k.min_checkpoint_id
+        RETURNING pg_column_size(w.*) AS size
+    )
+    SELECT count(*), coalesce(sum(size), 0) FROM deleted
+""")
+
+# blobs of namespaces that still have checkpoints are removed below the oldest kept
+# channel version, blobs of namespaces pruned completely in this run go as a whole
+_DELETE_OLD_BLOBS_SQL = text("""
+    WITH kept AS (
+        SELECT c.thread_id, c.checkpoint_ns, v.key AS channel, min(v.value) AS min_version
+        FROM checkpoints c, jsonb_each_text(c.checkpoint -> 'channel_versions') v
+        GROUP BY c.thread_id, c.checkpoint_ns, v.key
+    ), deleted AS (
+        DELETE FROM checkpoint_blobs b USING kept k
+        WHERE b.thread_id = k.thread_id AND b.checkpoint_ns = k.checkpoint_ns
+          AND b.channel = k.channel AND b.version < k.min_version
+        RETURNING pg_column_size(b.*) AS size
+    )
+    SELECT count(*), coalesce(sum(size), 0) FROM deleted
+""")
+
+_DELETE_PRUNED_NAMESPACE_BLOBS_SQL = text("""
+    WITH pruned AS (
+        SELECT * FROM unnest(CAST(:thread_ids AS text[]), CAST(:namespaces AS text[]))
+            AS p(thread_id, checkpoint_ns)
+    ), deleted AS (
+        DELETE FROM checkpoint_blobs b USING pruned p
+        WHERE b.thread_id = p.thread_id AND b.checkpoint_ns = p.checkpoint_ns
+          AND NOT EXISTS (
+              SELECT 1 FROM checkpoints c
+              WHERE c.thread_id = b.thread_id AND c.checkpoint_ns = b.checkpoint_ns
+          )
+        RETURNING pg_column_size(b.*) AS size
+    )
+    SELECT count(*), coalesce(sum(size), 0) FROM deleted
+""")
+
+
+async def prune_checkpoints(
+    keep_last: int = CHECKPOINT_KEEP_LAST,
+    thread_ttl_days: float = CHECKPOINT_THREAD_TTL_DAYS,
+) -> dict:
+    # keeps latest keep_last root checkpoints per thread with the subgraph checkpoints
+    # made since the oldest of them, drops threads
+    # idle for longer than thread_ttl_days. reclaimed bytes are sizes of deleted rows,
+    # disk space itself is returned to the os by (auto)vacuum
+    deleted_rows = {"checkpoints": 0, "checkpoint_writes": 0, "checkpoint_blobs": 0}
+    reclaimed_bytes = 0
+
+    async with get_async_engine().begin() as conn:
+        expired_threads = []
+        if thread_ttl_days > 0:
+            result = await conn.execute(_IDLE_THREADS_SQL, {"ttl_seconds": thread_ttl_days * 86400})
+            expired_threads = [row[0] for row in result.all()]
+        if expired_threads:
+            for table, statement in _DELETE_THREADS_SQL.items():
+                count, size = (await conn.execute(statement, {"thread_ids": expired_threads})).one()
+                deleted_rows[table] += count
+                reclaimed_bytes += size
+
+        if keep_last > 0:
+            count, size, thread_ids, namespaces = (
+                await conn.execute(_DELETE_OLD_CHECKPOINTS_SQL, {"keep_last": keep_last})
+            ).one()
+            deleted_rows["checkpoints"] += count
+            reclaimed_bytes += size
+            statements = [
+                ("checkpoint_writes", _DELETE_OLD_WRITES_SQL, {}),
+                ("checkpoint_blobs", _DELETE_OLD_BLOBS_SQL, {}),
+            ]
+            if thread_ids:
+                statements.append((
+                    "checkpoint_blobs",
+                    _DELETE_PRUNED_NAMESPACE_BLOBS_SQL,
+                    {"thread_ids": list(thread_ids), "namespaces": list(namespaces)},
+                ))
+            for table, statement, params in statements:
+                count, size = (await conn.execute(statement, params)).one()
+                deleted_rows[table] += count
+                reclaimed_bytes += size
+
+    return {
+        "expired_threads": len(expired_threads),
+        "deleted_rows": deleted_rows,
+        "reclaimed_bytes": int(reclaimed_bytes),
+    }
+
+
+async def run_checkpoint_retention(
+    interval_seconds: float = CHECKPOINT_RETENTION_INTERVAL_SECONDS,
+    keep_last: int = CHECKPOINT_KEEP_LAST,
+    thread_ttl_days: float = CHECKPOINT_THREAD_TTL_DAYS,
+) -> None:
+    # background task for the fastapi app, cancelled on shutdown
+    while True:
+        try:
+            report = await prune_checkpoints(keep_last, thread_ttl_days)
+            print(f"checkpoint retention: {report}")
+        except Exception as e:
+            print(f"checkpoint retention failed: {e}")
+        await asyncio.sleep(interval_seconds)
+
+
+async def _main(args: argparse.Namespace) -> None:
+    try:
+        report = await prune_checkpoints(args.keep_last, args.ttl_days)
+    finally:
+        await dispose_engine()
+    print(f"expired threads: {report['expired_threads']}")
+    for table, count in report["deleted_rows"].items():
+        print(f"deleted {table}: {count}")
+    print(f"reclaimed bytes: {report['reclaimed_bytes']}")
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Prune langgraph checkpoints stored in postgres")
+    parser.add_argument("--keep-last", type=int, default=CHECKPOINT_KEEP_LAST,
+                        help="checkpoints to keep per thread, 0 keeps all")
+    parser.add_argument("--ttl-days", type=float, default=CHECKPOINT_THREAD_TTL_DAYS,
+                        help="delete threads idle for longer than this, 0 disables expiry")
+    asyncio.run(_main(parser.parse_args()))
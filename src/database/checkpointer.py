@@ -0,0 +1,18 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+
+from .models import get_async_engine
+
+
+# checkpointer on a connection borrowed from the shared sqlalchemy pool instead of
+# its own separate connection. AsyncPostgresSaver serializes all its queries on one
+# connection anyway, so a single autocommit connection is what from_conn_string gave too
+@asynccontextmanager
+async def shared_pool_checkpointer() -> AsyncIterator[AsyncPostgresSaver]:
+    async with get_async_engine().connect() as connection:
+        # isolation level is restored by sqlalchemy when connection returns to the pool
+        await connection.execution_options(isolation_level="AUTOCOMMIT")
+        raw_connection = await connection.get_raw_connection()
+        yield AsyncPostgresSaver(conn=raw_connection.driver_connection)
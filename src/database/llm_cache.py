@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+
+from .models import LLMCacheEntry, get_async_session
+
+
+async def fetch_llm_response(cache_key: str, ttl_seconds: float) -> Optional[str]:
+    oldest = datetime.utcnow() - timedelta(seconds=ttl_seconds)
+    async with get_async_session() as session:
+        result = await session.execute(
+            select(LLMCacheEntry.generations).filter(
+                LLMCacheEntry.cache_key == cache_key,
+                LLMCacheEntry.created_at >= oldest,
+            )
+        )
+        return result.scalar_one_or_none()
+
+
+async def upload_llm_response(cache_key: str, generations: str) -> None:
+    statement = insert(LLMCacheEntry).values(
+        cache_key=cache_key, generations=generations, created_at=datetime.utcnow()
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[LLMCacheEntry.cache_key],
+        set_={
+            "generations": statement.excluded.generations,
+            "created_at": statement.excluded.created_at,
+        },
+    )
+    async with get_async_session() as session:
+        await session.execute(statement)
+        await session.commit()
+
+
+async def evict_llm_responses(max_entries: int, ttl_seconds: float) -> int:
+    # drops expired entries and the oldest ones above max_entries
+    oldest = datetime.utcnow() - timedelta(seconds=ttl_seconds)
+    async with get_async_session() as session:
+        expired = await session.execute(
+            delete(LLMCacheEntry).where(LLMCacheEntry.created_at < oldest)
+        )
+        overflow = (
+            select(LLMCacheEntry.id).order_by(LLMCacheEntry.created_at.desc()).offset(max_entries)
+        )
+        evicted = await session.execute(delete(LLMCacheEntry).where(LLMCacheEntry.id.in_(overflow)))
+        await session.commit()
+        return expired.rowcount + evicted.rowcount
@@ -1,3 +1,4 @@
+import asyncio
 from datetime import datetime
 import os
 from typing import Optional
@@ -7,6 +8,7 @@ from sqlalchemy import (
     Integer,
     String,
     Text,
+    text,
 )
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import (
@@ -21,6 +23,18 @@ _async_engine = None
 _AsyncSessionLocal: Optional[async_sessionmaker] = None
 
 
+# one pool per process, shared by the summary storage and the langgraph checkpointer
+# (see checkpointer.py), sized through envs
+def get_pool_settings() -> dict:
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_POOL_MAX_OVERFLOW", "10")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() in {"1", "true", "yes"},
+    }
+
+
 def get_async_engine():
     global _async_engine
     if _async_engine is None:
@@ -31,10 +45,43 @@ def get_async_engine():
             async_url = database_url.replace("postgresql://", "postgresql+psycopg://")
         else:
             async_url = database_url
-        _async_engine = create_async_engine(async_url, echo=False)
+        _async_engine = create_async_engine(async_url, echo=False, **get_pool_settings())
     return _async_engine
 
 
+async def warm_up_pool() -> None:
+    # opens pool_size connections upfront, so first requests dont pay for connecting.
+    # connections are held until all of them are open, otherwise the pool hands out the same one
+    async_engine = get_async_engine()
+    num_connections = max(0, async_engine.pool.size() - async_engine.pool.checkedout())
+    connections = await asyncio.gather(*(async_engine.connect() for _ in range(num_connections)))
+    try:
+        await asyncio.gather(*(conn.execute(text("SELECT 1")) for conn in connections))
+    finally:
+        for conn in connections:
+            await conn.close()
+
+
+def get_pool_stats() -> dict:
+    if _async_engine is None:
+        return {}
+    pool = _async_engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+    }
+
+
+async def dispose_engine() -> None:
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    _async_engine = None
+    _AsyncSessionLocal = None
+
+
 def get_async_sessionmaker() -> async_sessionmaker:
     global _AsyncSessionLocal
     if _AsyncSessionLocal is None:
@@ -57,6 +104,25 @@ class FileSummary(Base):
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
 
+class ArxivQueryCache(Base):
+    __tablename__ = "arxiv_query_cache"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    query_key: Mapped[str] = mapped_column(String(64), unique=True, nullable=False, index=True)
+    query: Mapped[str] = mapped_column(Text, nullable=False)
+    results: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class LLMCacheEntry(Base):
+    __tablename__ = "llm_response_cache"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    cache_key: Mapped[str] = mapped_column(String(64), unique=True, nullable=False, index=True)
+    generations: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+
 async def init_db():
     async_engine = get_async_engine()
     async with async_engine.begin() as conn:
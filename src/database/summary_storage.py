@@ -1,6 +1,8 @@
 import hashlib
+from datetime import datetime
 from typing import Optional, List, Dict
-from sqlalchemy import select
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from .models import get_async_session, FileSummary
@@ -25,30 +27,59 @@ async def fetch_summary(content: str, filepath: Optional[str] = None) -> Optiona
     return None
 
 
-async def upload_summary(content: str, summary: str, filepath: Optional[str] = None) -> None:
-    content_hash = get_content_hash(content)
+async def fetch_summaries(content_hashes: List[str]) -> Dict[str, str]:
+    # one round-trip for many files, result maps content hash to summary (misses are absent)
+    if not content_hashes:
+        return {}
     
     async with get_async_session() as session:
         result = await session.execute(
-            select(FileSummary).filter(FileSummary.content_hash == content_hash)
+            select(FileSummary.content_hash, FileSummary.summary)
+            .filter(FileSummary.content_hash.in_(set(content_hashes)))
         )
-        existing_summary = result.scalar_one_or_none()
-        
-        if existing_summary:
-            existing_summary.summary = summary
-            if filepath:
-                existing_summary.filepath = filepath
-        else:
-            new_summary = FileSummary(
-                content_hash=content_hash,
-                filepath=filepath,
-                summary=summary
-            )
-            session.add(new_summary)
-        
+        return {content_hash: summary for content_hash, summary in result.all()}
+
+
+def _upsert_summaries_statement(rows: List[Dict]):
+    # single statement insert-or-update, two workers missing the same file
+    # at the same moment no longer race into unique constraint error on content_hash
+    statement = insert(FileSummary).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=[FileSummary.content_hash],
+        set_={
+            "summary": statement.excluded.summary,
+            "filepath": func.coalesce(statement.excluded.filepath, FileSummary.filepath),
+            "updated_at": statement.excluded.updated_at,
+        },
+    )
+
+
+async def upload_summaries(items: List[Dict]) -> None:
+    # items are dicts with "content", "summary" and optional "filepath" keys
+    now = datetime.utcnow()
+    rows = {}
+    for item in items:
+        content_hash = get_content_hash(item["content"])
+        # postgres refuses to update the same row twice in one statement, last item wins
+        rows[content_hash] = {
+            "content_hash": content_hash,
+            "filepath": item.get("filepath"),
+            "summary": item["summary"],
+            "created_at": now,
+            "updated_at": now,
+        }
+    if not rows:
+        return
+    
+    async with get_async_session() as session:
+        await session.execute(_upsert_summaries_statement(list(rows.values())))
         await session.commit()
 
 
+async def upload_summary(content: str, summary: str, filepath: Optional[str] = None) -> None:
+    await upload_summaries([{"content": content, "summary": summary, "filepath": filepath}])
+
+
 async def fetch_summary_by_filepath(filepath: str) -> Optional[str]:
     async with get_async_session() as session:
         result = await session.execute(
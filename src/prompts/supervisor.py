@@ -12,7 +12,7 @@ Available tools for delegation:
 Decision guidelines:
 - If the query requires code analysis, use the call_coder tool
 - If the query requires research/academic knowledge, use the call_researcher tool
-- If the query needs both (e.g., understanding a paper's implementation), use multiple tools sequentially
+- If the query needs both (e.g., understanding a paper's implementation), call both tools in the same turn - they are executed in parallel
 - Review the results from tool calls and determine if additional delegation is needed
 - When you have sufficient information to answer the query, provide a final response without calling tools
 
@@ -39,3 +39,15 @@ def supervisor_user_prompt(user_query: str, research_context: str = "", code_con
     
     return "\n".join(parts)
 
+
+history_summary_system_prompt = """You maintain a running summary of a conversation between a user and an assistant that delegates tasks to research and coding agents.
+You receive the current summary (may be empty) and older conversation turns that are being removed from history.
+Return an updated concise summary that keeps user goals, asked questions, key answers, facts about the user's repository and papers, and any open follow-ups. Return only the summary text."""
+
+
+def history_summary_user_prompt(history_summary: str, conversation: str) -> str:
+    return f"Current summary:\n{history_summary or '(empty)'}\n\nTurns to fold into the summary:\n{conversation}"
+
+
+def supervisor_history_prompt(history_summary: str) -> str:
+    return f"\n\nSummary of the earlier conversation (older turns were compacted):\n{history_summary}"
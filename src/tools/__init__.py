@@ -2,19 +2,41 @@ from .coding_tools import (
     get_git_history,
     get_file_history,
     read_file_content,
+    read_full_text,
+    resolve_project_file,
     call_code_reader,
     list_directory,
+    find_symbol,
+    get_symbol_source,
+    search_code,
+)
+from .code_search import shutdown_code_search
+from .research_tools import search_arxiv, search_local_papers
+from .symbol_index import warm_up_symbol_index
+from .external_memory import (
+    memorize_file_summary,
+    recall_file_summaries,
+    recall_file_summary,
+    summary_cache_stats,
 )
-from .research_tools import search_arxiv
-from .external_memory import recall_file_summary, memorize_file_summary
 
 __all__ = [
     "get_git_history",
     "get_file_history",
     "read_file_content",
+    "read_full_text",
+    "resolve_project_file",
     "call_code_reader",
     "list_directory",
+    "find_symbol",
+    "get_symbol_source",
+    "search_code",
     "search_arxiv",
+    "search_local_papers",
     "recall_file_summary",
+    "recall_file_summaries",
     "memorize_file_summary",
+    "summary_cache_stats",
+    "shutdown_code_search",
+    "warm_up_symbol_index",
 ]
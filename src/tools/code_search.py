@@ -0,0 +1,364 @@
+import fnmatch
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import threading
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from .file_reader import BINARY_SNIFF_BYTES, looks_binary
+from .repo_index import project_files
+
+try:
+    from re import _parser as sre_parse
+except ImportError:
+    sre_parse = None
+
+
+CODE_SEARCH_INDEX_DIR = Path(os.getenv("CODE_SEARCH_INDEX_DIR", ".cache/code_search"))
+# tree is checked for changed files at most this often
+CODE_SEARCH_REFRESH_SECONDS = float(os.getenv("CODE_SEARCH_REFRESH_SECONDS", "5"))
+CODE_SEARCH_MAX_FILE_BYTES = int(os.getenv("CODE_SEARCH_MAX_FILE_BYTES", str(1024 * 1024)))
+CODE_SEARCH_MAX_MATCHES = int(os.getenv("CODE_SEARCH_MAX_MATCHES", "50"))
+CODE_SEARCH_MAX_MATCHES_PER_FILE = int(os.getenv("CODE_SEARCH_MAX_MATCHES_PER_FILE", "5"))
+CODE_SEARCH_CONTEXT_LINES = int(os.getenv("CODE_SEARCH_CONTEXT_LINES", "2"))
+CODE_SEARCH_WORKERS = int(os.getenv("CODE_SEARCH_WORKERS", str(os.cpu_count() or 1)))
+# below this many files indexing or verifying inline is cheaper than using workers
+CODE_SEARCH_POOL_THRESHOLD = int(os.getenv("CODE_SEARCH_POOL_THRESHOLD", "200"))
+MAX_LINE_CHARS = 300
+
+
+def file_trigrams(root: str, rel: str) -> Tuple[str, int, int, Optional[array]]:
+    # runs in worker processes. trigrams are taken from ascii-lowercased bytes, so one
+    # index serves both case-sensitive and case-insensitive queries.
+    # None trigrams mark files that are not searched (binary or too large)
+    path = os.path.join(root, rel)
+    try:
+        stat = os.stat(path)
+        if stat.st_size > CODE_SEARCH_MAX_FILE_BYTES:
+            return rel, stat.st_mtime_ns, stat.st_size, None
+        with open(path, "rb") as f:
+            content = f.read()
+    except OSError:
+        return rel, 0, -1, None
+    if looks_binary(content[:BINARY_SNIFF_BYTES]):
+        return rel, stat.st_mtime_ns, stat.st_size, None
+    content = content.lower()
+    trigrams = {content[i:i + 3] for i in range(len(content) - 2)}
+    return (
+        rel,
+        stat.st_mtime_ns,
+        stat.st_size,
+        array("I", sorted(int.from_bytes(t, "big") for t in trigrams)),
+    )
+
+
+def _literal_runs(parsed, runs: List[str]) -> None:
+    # literal strings every match must contain. anything that is not a plain literal
+    # breaks the current run, optional parts and alternations are skipped entirely
+    current = []
+
+    def flush() -> None:
+        if current:
+            runs.append("".join(current))
+            current.clear()
+
+    for op, arg in parsed:
+        if op is sre_parse.LITERAL:
+            current.append(chr(arg))
+            continue
+        flush()
+        if op is sre_parse.SUBPATTERN:
+            _literal_runs(arg[-1], runs)
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT, sre_parse.POSSESSIVE_REPEAT):
+            low, _, sub = arg
+            if low >= 1:
+                _literal_runs(sub, runs)
+    flush()
+
+
+def required_trigrams(pattern: str, ignore_case: bool) -> Set[int]:
+    if sre_parse is None:
+        return set()
+    try:
+        parsed = sre_parse.parse(pattern, re.IGNORECASE if ignore_case else 0)
+    except re.error:
+        return set()
+    ignore_case = ignore_case or bool(parsed.state.flags & re.IGNORECASE)
+    runs: List[str] = []
+    _literal_runs(parsed, runs)
+    trigrams = set()
+    for run in runs:
+        if ignore_case and not run.isascii():
+            # non-ascii case folding does not match ascii-lowercased index
+            continue
+        data = run.encode("utf-8").lower()
+        trigrams.update(int.from_bytes(data[i:i + 3], "big") for i in range(len(data) - 2))
+    return trigrams
+
+
+def grep_file(
+    root: str, rel: str, regex: "re.Pattern", context: int, max_matches: int
+) -> List[Tuple[int, List[Tuple[int, str, bool]]]]:
+    # runs in worker processes. returns (match line, [(line no, text, is_match)]) blocks
+    try:
+        with open(os.path.join(root, rel), "r", encoding="utf-8", errors="replace") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return []
+    hits = []
+    for i, line in enumerate(lines):
+        if regex.search(line):
+            hits.append(i)
+            if len(hits) >= max_matches:
+                break
+    blocks = []
+    for i in hits:
+        start, end = max(i - context, 0), min(i + context + 1, len(lines))
+        blocks.append(
+            (i + 1, [(j + 1, lines[j][:MAX_LINE_CHARS], j in hits) for j in range(start, end)])
+        )
+    return blocks
+
+
+def _grep_many(args: Tuple[str, List[str], "re.Pattern", int, int]) -> List[Tuple[str, list]]:
+    root, rels, regex, context, max_matches = args
+    return [(rel, grep_file(root, rel, regex, context, max_matches)) for rel in rels]
+
+
+# persistent trigram index of all text files list_directory would show.
+# query literals are split into trigrams, only files containing all of them are
+# verified with the real regex. files are reindexed only when their mtime/size change
+class CodeSearchIndex:
+    def __init__(self, root: Path):
+        self.root = root
+        root_hash = hashlib.sha256(str(root).encode()).hexdigest()[:16]
+        self.manifest_path = CODE_SEARCH_INDEX_DIR / f"{root_hash}.json"
+        self.trigrams_path = CODE_SEARCH_INDEX_DIR / f"{root_hash}.trigrams"
+        # rel -> (mtime_ns, size), trigrams of searchable files and inverted postings
+        self._files: Dict[str, Tuple[int, int]] = {}
+        self._trigrams: Dict[str, array] = {}
+        self._postings: Dict[int, Set[str]] = {}
+        self._refreshed_at = float("-inf")
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            manifest = json.loads(self.manifest_path.read_text())
+            data = array("I")
+            with open(self.trigrams_path, "rb") as f:
+                data.frombytes(f.read())
+        except (OSError, ValueError):
+            return
+        if manifest.get("root") != str(self.root):
+            return
+        for rel, (mtime, size, offset, count) in manifest["files"].items():
+            self._files[rel] = (mtime, size)
+            if count >= 0:
+                self._add(rel, data[offset:offset + count])
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            data = array("I")
+            files = {}
+            for rel, (mtime, size) in self._files.items():
+                trigrams = self._trigrams.get(rel)
+                files[rel] = [mtime, size, len(data), len(trigrams) if trigrams is not None else -1]
+                if trigrams is not None:
+                    data.extend(trigrams)
+            self._dirty = False
+        CODE_SEARCH_INDEX_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.trigrams_path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            data.tofile(f)
+        tmp_path.replace(self.trigrams_path)
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({"root": str(self.root), "files": files}))
+        tmp_path.replace(self.manifest_path)
+
+    def _add(self, rel: str, trigrams: array) -> None:
+        self._trigrams[rel] = trigrams
+        for trigram in trigrams:
+            postings = self._postings.get(trigram)
+            if postings is None:
+                self._postings[trigram] = postings = set()
+            postings.add(rel)
+
+    def _remove(self, rel: str) -> None:
+        self._files.pop(rel, None)
+        for trigram in self._trigrams.pop(rel, ()):
+            postings = self._postings.get(trigram)
+            if postings is not None:
+                postings.discard(rel)
+                if not postings:
+                    del self._postings[trigram]
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        # spawn, forking a process with running event loop and threads is unsafe
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=CODE_SEARCH_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    def close(self) -> None:
+        # stops worker processes, a later search starts a new pool when needed
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _use_pool(self, count: int) -> bool:
+        return count >= CODE_SEARCH_POOL_THRESHOLD and CODE_SEARCH_WORKERS > 1
+
+    def _changed(self, rel: str) -> bool:
+        indexed = self._files.get(rel)
+        if indexed is None:
+            return True
+        try:
+            stat = os.stat(self.root / rel)
+        except OSError:
+            return True
+        return (stat.st_mtime_ns, stat.st_size) != indexed
+
+    def refresh(self, force: bool = False) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._refreshed_at < CODE_SEARCH_REFRESH_SECONDS:
+                return
+            files = project_files(self.root)
+            for rel in set(self._files) - set(files):
+                self._remove(rel)
+                self._dirty = True
+            changed = [rel for rel in files if self._changed(rel)]
+            root = str(self.root)
+            if self._use_pool(len(changed)):
+                results = self._get_pool().map(
+                    file_trigrams, [root] * len(changed), changed, chunksize=32
+                )
+            else:
+                results = (file_trigrams(root, rel) for rel in changed)
+            for rel, mtime, size, trigrams in results:
+                self._remove(rel)
+                if size >= 0:
+                    self._files[rel] = (mtime, size)
+                    if trigrams is not None:
+                        self._add(rel, trigrams)
+                self._dirty = True
+            self._refreshed_at = now
+
+    def candidates(self, pattern: str, ignore_case: bool) -> List[str]:
+        required = required_trigrams(pattern, ignore_case)
+        with self._lock:
+            if not required:
+                return sorted(self._trigrams)
+            postings = sorted((self._postings.get(t, set()) for t in required), key=len)
+            result = set(postings[0])
+            for other in postings[1:]:
+                if not result:
+                    break
+                result &= other
+            return sorted(result)
+
+    def search(
+        self,
+        pattern: str,
+        glob: str = "",
+        ignore_case: bool = False,
+        context: int = CODE_SEARCH_CONTEXT_LINES,
+        max_matches: int = CODE_SEARCH_MAX_MATCHES,
+    ) -> Tuple[List[Tuple[str, list]], int]:
+        # (blocks per file, number of candidate files)
+        self.refresh()
+        try:
+            regex = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+        except re.error:
+            # not a valid regex, search it as plain text
+            pattern = re.escape(pattern)
+            regex = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+        rels = self.candidates(pattern, ignore_case)
+        if glob:
+            # glob without a slash matches file names at any depth, like in gitignore
+            rels = [
+                rel
+                for rel in rels
+                if fnmatch.fnmatchcase(
+                    rel if "/" in glob else rel.rpartition("/")[2], glob.lstrip("/")
+                )
+            ]
+        root = str(self.root)
+        per_file = min(CODE_SEARCH_MAX_MATCHES_PER_FILE, max_matches)
+        if self._use_pool(len(rels)):
+            batch = max(len(rels) // (CODE_SEARCH_WORKERS * 4), 1)
+            batches = [
+                (root, rels[i : i + batch], regex, context, per_file)
+                for i in range(0, len(rels), batch)
+            ]
+            results = [
+                item for chunk in self._get_pool().map(_grep_many, batches) for item in chunk
+            ]
+        else:
+            results = _grep_many((root, rels, regex, context, per_file))
+        found = []
+        total = 0
+        for rel, blocks in results:
+            if not blocks:
+                continue
+            blocks = blocks[:max_matches - total]
+            found.append((rel, blocks))
+            total += len(blocks)
+            if total >= max_matches:
+                break
+        return found, len(rels)
+
+
+_code_search_indexes: Dict[Path, CodeSearchIndex] = {}
+_code_search_indexes_lock = threading.Lock()
+
+
+def get_code_search_index(root: Path) -> CodeSearchIndex:
+    with _code_search_indexes_lock:
+        index = _code_search_indexes.get(root)
+        if index is None:
+            index = CodeSearchIndex(root)
+            _code_search_indexes[root] = index
+        return index
+
+
+def shutdown_code_search() -> None:
+    # called on app / cli shutdown next to closing llm clients and the db engine
+    with _code_search_indexes_lock:
+        indexes = list(_code_search_indexes.values())
+    for index in indexes:
+        index.close()
+
+
+def format_search_results(results: List[Tuple[str, list]], max_matches: int) -> str:
+    # grep-like output, ":" marks matching lines and "-" context lines
+    total = sum(len(blocks) for _, blocks in results)
+    lines = [
+        f"{total} matches in {len(results)} files"
+        + (" (limit reached)" if total >= max_matches else "")
+    ]
+    for rel, blocks in results:
+        lines.append("")
+        lines.append(rel)
+        last_line = 0
+        for _, block in blocks:
+            if last_line and block[0][0] > last_line + 1:
+                lines.append("--")
+            for line_no, text, is_match in block:
+                if line_no <= last_line:
+                    continue
+                lines.append(f"{line_no}{':' if is_match else '-'} {text}")
+                last_line = line_no
+    return "\n".join(lines)
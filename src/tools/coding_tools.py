@@ -1,53 +1,27 @@
 import subprocess
 import asyncio
-import fnmatch
+import os
 from pathlib import Path
 
 from langchain.tools import tool
 
+from .code_search import CODE_SEARCH_MAX_MATCHES, format_search_results, get_code_search_index
+from .file_reader import READ_FILE_MAX_BYTES, read_file_range
+from .git_runner import GIT_OUTPUT_MAX_BYTES, cached_git
+from .gitignore import RepoIgnore, get_repo_ignore
+from .repo_index import RepoTreeIndex, get_repo_index
+from .symbol_index import get_symbol_index
 
-def load_ignore_patterns(directory: Path) -> list[str]:
-    patterns = []
-    for ignore_file in [".gitignore", ".dockerignore"]:
-        ignore_path = directory / ignore_file
-        if ignore_path.exists() and ignore_path.is_file():
-            try:
-                with open(ignore_path, "r", encoding="utf-8") as f:
-                    for line in f:
-                        line = line.strip()
-                        if line and not line.startswith("#"):
-                            patterns.append(line)
-            except Exception:
-                pass
-    return patterns
 
+LIST_DIRECTORY_MAX_DEPTH = int(os.getenv("LIST_DIRECTORY_MAX_DEPTH", "4"))
+LIST_DIRECTORY_MAX_ENTRIES = int(os.getenv("LIST_DIRECTORY_MAX_ENTRIES", "400"))
 
-def should_ignore(path: Path, ignore_dir: Path, root: Path, patterns: list[str]) -> bool:
-    try:
-        rel_to_ignore = path.relative_to(ignore_dir)
-    except ValueError:
-        return False
-    
-    path_str = str(rel_to_ignore).replace("\\", "/")
-    path_parts = path_str.split("/")
-    
-    for pattern in patterns:
-        pattern = pattern.rstrip("/")
-        if not pattern:
-            continue
-        
-        if pattern.startswith("/"):
-            pattern = pattern[1:]
-            if fnmatch.fnmatch(path_parts[0], pattern) or fnmatch.fnmatch(path_str, pattern):
-                return True
-        elif "/" in pattern:
-            if fnmatch.fnmatch(path_str, pattern) or any(fnmatch.fnmatch("/".join(path_parts[i:]), pattern) for i in range(len(path_parts))):
-                return True
-        else:
-            if any(fnmatch.fnmatch(part, pattern) for part in path_parts) or fnmatch.fnmatch(path.name, pattern):
-                return True
-    
-    return False
+
+def format_git_output(output: str, truncated: bool) -> str:
+    output = output.strip()
+    if truncated:
+        output += f"\n... (output truncated at {GIT_OUTPUT_MAX_BYTES} bytes, lower the limit)"
+    return output
 
 
 @tool
@@ -56,17 +30,8 @@ async def get_git_history(limit: int = 5) -> str:
     if limit <= 0:
         limit = 5
     try:
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(
-            None,
-            lambda: subprocess.run(
-                ["git", "log", f"-n{limit}", "--name-status"],
-                check=True,
-                capture_output=True,
-                text=True,
-            )
-        )
-        return result.stdout.strip()
+        output, truncated = await cached_git(("log", f"-n{limit}", "--name-status"))
+        return format_git_output(output, truncated)
     except subprocess.CalledProcessError as exc:
         return exc.stderr.strip() or "Unable to read git history"
     except FileNotFoundError:
@@ -79,26 +44,16 @@ async def get_file_history(filepath: str, limit: int = 3) -> str:
     if limit <= 0:
         limit = 3
     try:
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(
-            None,
-            lambda: subprocess.run(
-                ["git", "log", f"-n{limit}", "-p", "--", filepath],
-                check=True,
-                capture_output=True,
-                text=True,
-            )
-        )
-        return result.stdout.strip() or "No history found for this file."
+        output, truncated = await cached_git(("log", f"-n{limit}", "-p", "--", filepath))
+        return format_git_output(output, truncated) or "No history found for this file."
     except subprocess.CalledProcessError as exc:
         return exc.stderr.strip() or "Unable to get file history"
     except FileNotFoundError:
         return "git is not available"
 
 
-@tool
-async def read_file_content(filepath: str) -> str:
-    """Read the content of a file from the project directory."""
+def resolve_project_file(filepath: str) -> Path | str:
+    # resolved path inside the project, or an error message for the agent
     root = Path.cwd().resolve()
     path = Path(filepath).expanduser().resolve()
     try:
@@ -109,6 +64,14 @@ async def read_file_content(filepath: str) -> str:
         return "File not found."
     if not path.is_file():
         return "Target is not a file."
+    return path
+
+
+async def read_full_text(filepath: str) -> str:
+    """Whole file as text, used by code_reader that summarizes files as a whole."""
+    path = resolve_project_file(filepath)
+    if isinstance(path, str):
+        return path
     try:
         loop = asyncio.get_event_loop()
         return await loop.run_in_executor(None, path.read_text)
@@ -116,18 +79,94 @@ async def read_file_content(filepath: str) -> str:
         return "Unable to read file as text."
 
 
+@tool
+async def read_file_content(
+    filepath: str,
+    start_line: int = 1,
+    end_line: int = 0,
+    byte_offset: int = -1,
+    max_bytes: int = READ_FILE_MAX_BYTES,
+) -> str:
+    """Read a range of lines of a file from the project directory.
+    
+    Args:
+        filepath: Path of the file to read.
+        start_line: First line to show, 1-based.
+        end_line: Last line to show, 0 shows a default sized page.
+        byte_offset: When set (>= 0), shows a byte window starting here instead of lines.
+        max_bytes: Cap on the returned content size.
+    """
+    path = resolve_project_file(filepath)
+    if isinstance(path, str):
+        return path
+    try:
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            None,
+            lambda: read_file_range(path, filepath, start_line, end_line, byte_offset, max_bytes),
+        )
+    except OSError as exc:
+        return f"Unable to read file: {exc}"
+
+
 @tool
 async def call_code_reader(filepath: str) -> str:
     """Read the content of the file"""
     return "devlead_node must call code_reader_node"
 
 
+def render_tree(
+    index: RepoTreeIndex,
+    ignore: RepoIgnore,
+    path: Path,
+    max_depth: int,
+    max_entries: int,
+) -> str:
+    root = index.root
+    start_rel = path.relative_to(root).as_posix()
+    lines = [path.name + "/"]
+    shown = 0
+    truncated = False
+
+    def walk(rel: str, prefix: str, depth: int) -> None:
+        nonlocal shown, truncated
+        items = [
+            (name, is_dir)
+            for name, is_dir in index.entries(rel)
+            if not ignore.is_ignored(name if rel == "." else f"{rel}/{name}", is_dir)
+        ]
+        for i, (name, is_dir) in enumerate(items):
+            if shown >= max_entries:
+                truncated = True
+                return
+            is_last = i == len(items) - 1
+            current_prefix = "└── " if is_last else "├── "
+            lines.append(f"{prefix}{current_prefix}{name}{'/' if is_dir else ''}")
+            shown += 1
+            if is_dir and (max_depth <= 0 or depth < max_depth):
+                extension = "    " if is_last else "│   "
+                walk(name if rel == "." else f"{rel}/{name}", prefix + extension, depth + 1)
+
+    walk(start_rel, "", 1)
+    if shown == 0:
+        lines.append("└── (empty)")
+    if truncated:
+        lines.append(f"... (output truncated at {max_entries} entries, list a subdirectory or lower max_depth)")
+    return "\n".join(lines)
+
+
 @tool
-async def list_directory(directory: str = ".") -> str:
+async def list_directory(
+    directory: str = ".",
+    max_depth: int = LIST_DIRECTORY_MAX_DEPTH,
+    max_entries: int = LIST_DIRECTORY_MAX_ENTRIES,
+) -> str:
     """List the structure of the current directory or specified directory.
     
     Args:
         directory: The directory path to list. Defaults to current directory ".".
+        max_depth: How many levels of subdirectories to show, 0 means unlimited.
+        max_entries: Maximum number of entries in the output.
     """
     root = Path.cwd().resolve()
     if not directory or directory == "":
@@ -141,55 +180,96 @@ async def list_directory(directory: str = ".") -> str:
         return "Directory not found."
     if not path.is_dir():
         return "Target is not a directory."
+    if max_entries <= 0:
+        max_entries = LIST_DIRECTORY_MAX_ENTRIES
     try:
         loop = asyncio.get_event_loop()
-        
-        ignore_patterns = load_ignore_patterns(path)
-        
-        def build_tree(dir_path: Path, prefix: str = "", is_last: bool = True) -> str:
-            lines = []
-            try:
-                items = sorted(dir_path.iterdir(), key=lambda x: (x.is_file(), x.name))
-                filtered_items = [item for item in items if not should_ignore(item, path, root, ignore_patterns)]
-                
-                for i, item in enumerate(filtered_items):
-                    is_last_item = i == len(filtered_items) - 1
-                    current_prefix = "└── " if is_last_item else "├── "
-                    lines.append(f"{prefix}{current_prefix}{item.name}{'/' if item.is_dir() else ''}")
-                    
-                    if item.is_dir():
-                        extension = "    " if is_last_item else "│   "
-                        subtree = build_tree(item, prefix + extension, is_last_item)
-                        if subtree.strip():
-                            lines.append(subtree)
-            except PermissionError:
-                pass
-            return "\n".join(lines)
+        index = get_repo_index(root)
+        ignore = get_repo_ignore(root)
         
         def get_structure():
-            tree = path.name + ("/" if path.is_dir() else "")
-            try:
-                items = sorted(path.iterdir(), key=lambda x: (x.is_file(), x.name))
-                filtered_items = [item for item in items if not should_ignore(item, path, root, ignore_patterns)]
-                
-                if not filtered_items:
-                    return tree + "\n└── (empty)"
-                tree_lines = [tree]
-                for i, item in enumerate(filtered_items):
-                    is_last = i == len(filtered_items) - 1
-                    current_prefix = "└── " if is_last else "├── "
-                    tree_lines.append(f"{current_prefix}{item.name}{'/' if item.is_dir() else ''}")
-                    if item.is_dir():
-                        extension = "    " if is_last else "│   "
-                        subtree = build_tree(item, extension, is_last)
-                        if subtree.strip():
-                            tree_lines.append(subtree)
-                return "\n".join(tree_lines)
-            except PermissionError:
-                return tree + "\n└── (permission denied)"
+            tree = render_tree(index, ignore, path, max_depth, max_entries)
+            index.save()
+            return tree
         
         return await loop.run_in_executor(None, get_structure)
     except PermissionError:
         return "Permission denied."
     except Exception as exc:
         return f"Error listing directory: {str(exc)}"
+
+
+@tool
+async def search_code(pattern: str, glob: str = "", ignore_case: bool = False) -> str:
+    """Search the project files for a regex (or plain text) and show matching lines with context.
+    
+    Args:
+        pattern: Python regular expression or plain text, e.g. "def build_graph" or "get_llm\\(".
+        glob: Optional file filter, e.g. "*.py" or "src/agent/*.py".
+        ignore_case: Match case-insensitively.
+    """
+    if not pattern:
+        return "Empty pattern."
+    index = get_code_search_index(Path.cwd().resolve())
+    loop = asyncio.get_event_loop()
+    
+    def run_search():
+        results, _ = index.search(pattern, glob, ignore_case)
+        index.save()
+        return results
+    
+    try:
+        results = await loop.run_in_executor(None, run_search)
+    except Exception as exc:
+        return f"Error searching code: {str(exc)}"
+    if not results:
+        return f"No matches for {pattern}."
+    return format_search_results(results, CODE_SEARCH_MAX_MATCHES)
+
+
+def format_symbol(symbol) -> str:
+    line = f"{symbol.kind} {symbol.qualname} - {symbol.path}:{symbol.start_line}-{symbol.end_line}"
+    return f"{line} - {symbol.doc}" if symbol.doc else line
+
+
+@tool
+async def find_symbol(name: str) -> str:
+    """Find where a python class, function, method, module or module level variable is defined.
+    
+    Args:
+        name: Symbol name, e.g. "build_graph", "SummaryLRUCache.get" or "src.agent.graph".
+    """
+    index = get_symbol_index(Path.cwd().resolve())
+    loop = asyncio.get_event_loop()
+    symbols = await loop.run_in_executor(None, index.find, name)
+    if not symbols:
+        return f"No symbol matching {name} found."
+    return "\n".join(format_symbol(symbol) for symbol in symbols)
+
+
+@tool
+async def get_symbol_source(name: str, path: str = "") -> str:
+    """Get source code of a python definition without reading the whole file.
+    
+    Args:
+        name: Symbol name, e.g. "build_graph" or "SummaryLRUCache.get".
+        path: Optional file path to pick one of several definitions with the same name.
+    """
+    index = get_symbol_index(Path.cwd().resolve())
+    loop = asyncio.get_event_loop()
+    symbols = await loop.run_in_executor(None, index.find, name, path)
+    if not symbols:
+        return f"No symbol matching {name} found."
+    symbol = symbols[0]
+    try:
+        source = await loop.run_in_executor(None, index.source, symbol)
+    except OSError as exc:
+        return f"Unable to read {symbol.path}: {exc}"
+    if len(source.encode()) > READ_FILE_MAX_BYTES:
+        source = source.encode()[:READ_FILE_MAX_BYTES].decode(errors="ignore")
+        source += f"\n... (truncated, use read_file_content on {symbol.path} to page through it)"
+    result = f"{format_symbol(symbol)}\n{source}"
+    if len(symbols) > 1:
+        others = "\n".join(format_symbol(other) for other in symbols[1:])
+        result += f"\n\nOther matches, pass path to pick one:\n{others}"
+    return result
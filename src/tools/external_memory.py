@@ -1,35 +1,141 @@
+import asyncio
 import os
-import hashlib
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
-from src.database import fetch_summary, upload_summary
+from src.database import fetch_summaries, fetch_summary, get_content_hash, upload_summary
 
 
 LONG_TERM_MEMORY_DIR = Path(os.getenv("LONG_TERM_MEMORY_DIR", ".cache/agent_memory"))
+SUMMARY_CACHE_MAX_BYTES = int(os.getenv("SUMMARY_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+
+
+# in-process lru tier in front of both long term memory backends,
+# hot files (main.py, readme, ...) are recalled in almost every coder run
+class SummaryLRUCache:
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _entry_size(key: str, value: str) -> int:
+        return len(key) + len(value.encode())
+
+    def get(self, key: str) -> Optional[str]:
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: str) -> None:
+        size = self._entry_size(key, value)
+        if size > self.max_bytes:
+            return
+        old_value = self._entries.pop(key, None)
+        if old_value is not None:
+            self._size -= self._entry_size(key, old_value)
+        self._entries[key] = value
+        self._size += size
+        while self._size > self.max_bytes:
+            old_key, old_value = self._entries.popitem(last=False)
+            self._size -= self._entry_size(old_key, old_value)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+_summary_cache = SummaryLRUCache(SUMMARY_CACHE_MAX_BYTES)
+
+
+def summary_cache_stats() -> dict:
+    return _summary_cache.stats()
+
 
 def _should_use_db(use_db: Optional[bool] = None) -> bool:
     if use_db is not None:
         return use_db
     return bool(os.getenv("DATABASE_URL"))
 
-async def recall_file_summary(content: str, use_db: Optional[bool] = None) -> Optional[str]:
-    if _should_use_db(use_db):
-        return await fetch_summary(content)
-    
-    content_hash = hashlib.sha256(content.encode()).hexdigest()
+
+def _read_local_summary(content_hash: str) -> Optional[str]:
     memory_file = LONG_TERM_MEMORY_DIR / f"{content_hash}.txt"
     if memory_file.exists():
         return memory_file.read_text()
     return None
 
 
+def _write_local_summary(content_hash: str, summary: str) -> None:
+    LONG_TERM_MEMORY_DIR.mkdir(parents=True, exist_ok=True)
+    memory_file = LONG_TERM_MEMORY_DIR / f"{content_hash}.txt"
+    memory_file.write_text(summary)
+
+
+async def recall_file_summary(content: str, use_db: Optional[bool] = None) -> Optional[str]:
+    content_hash = get_content_hash(content)
+    summary = _summary_cache.get(content_hash)
+    if summary is not None:
+        return summary
+    
+    if _should_use_db(use_db):
+        summary = await fetch_summary(content)
+    else:
+        loop = asyncio.get_event_loop()
+        summary = await loop.run_in_executor(None, _read_local_summary, content_hash)
+    
+    if summary is not None:
+        _summary_cache.put(content_hash, summary)
+    return summary
+
+
+async def recall_file_summaries(contents: List[str], use_db: Optional[bool] = None) -> List[Optional[str]]:
+    # batch variant of recall_file_summary, lru misses are fetched in one db round-trip
+    content_hashes = [get_content_hash(content) for content in contents]
+    summaries = [_summary_cache.get(content_hash) for content_hash in content_hashes]
+    missing = [content_hash for content_hash, summary in zip(content_hashes, summaries) if summary is None]
+    if not missing:
+        return summaries
+    
+    if _should_use_db(use_db):
+        fetched = await fetch_summaries(missing)
+    else:
+        loop = asyncio.get_event_loop()
+        local = await asyncio.gather(
+            *(loop.run_in_executor(None, _read_local_summary, content_hash) for content_hash in missing)
+        )
+        fetched = {content_hash: summary for content_hash, summary in zip(missing, local) if summary is not None}
+    
+    for content_hash, summary in fetched.items():
+        _summary_cache.put(content_hash, summary)
+    return [
+        summary if summary is not None else fetched.get(content_hash)
+        for content_hash, summary in zip(content_hashes, summaries)
+    ]
+
+
 async def memorize_file_summary(content: str, summary: str, use_db: Optional[bool] = None) -> None:
+    content_hash = get_content_hash(content)
+    # write-through, so the next recall in this process never leaves it
+    _summary_cache.put(content_hash, summary)
+    
     if _should_use_db(use_db):
         await upload_summary(content, summary)
         return
     
-    LONG_TERM_MEMORY_DIR.mkdir(parents=True, exist_ok=True)
-    content_hash = hashlib.sha256(content.encode()).hexdigest()
-    memory_file = LONG_TERM_MEMORY_DIR / f"{content_hash}.txt"
-    memory_file.write_text(summary)
+    loop = asyncio.get_event_loop()
+    await loop.run_in_executor(None, _write_local_summary, content_hash, summary)
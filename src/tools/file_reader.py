@@ -0,0 +1,109 @@
+import codecs
+import mmap
+import os
+from pathlib import Path
+
+
+READ_FILE_MAX_BYTES = int(os.getenv("READ_FILE_MAX_BYTES", str(32 * 1024)))
+READ_FILE_DEFAULT_LINES = int(os.getenv("READ_FILE_DEFAULT_LINES", "300"))
+BINARY_SNIFF_BYTES = 1024
+SCAN_CHUNK_BYTES = 1024 * 1024
+
+
+def looks_binary(head: bytes) -> bool:
+    # NUL bytes or invalid utf-8 in the first KB, a multibyte char cut at the end is fine
+    if b"\0" in head:
+        return True
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+    except UnicodeDecodeError:
+        return True
+    return False
+
+
+def _count_lines(mm: mmap.mmap) -> int:
+    # slices of the mmap are copied one chunk at a time, never the whole file
+    newlines = sum(
+        mm[pos:pos + SCAN_CHUNK_BYTES].count(b"\n") for pos in range(0, len(mm), SCAN_CHUNK_BYTES)
+    )
+    return newlines + (0 if mm[-1:] == b"\n" else 1)
+
+
+def _line_offset(mm: mmap.mmap, line: int) -> int:
+    # byte offset where 1-based line starts
+    remaining = line - 1
+    pos = 0
+    while remaining > 0 and pos < len(mm):
+        chunk = mm[pos:pos + SCAN_CHUNK_BYTES]
+        newlines = chunk.count(b"\n")
+        if newlines < remaining:
+            remaining -= newlines
+            pos += len(chunk)
+            continue
+        index = -1
+        for _ in range(remaining):
+            index = chunk.find(b"\n", index + 1)
+        return pos + index + 1
+    return min(pos, len(mm))
+
+
+def read_file_range(
+    path: Path,
+    display_name: str,
+    start_line: int = 1,
+    end_line: int = 0,
+    byte_offset: int = -1,
+    max_bytes: int = READ_FILE_MAX_BYTES,
+) -> str:
+    max_bytes = min(max_bytes, READ_FILE_MAX_BYTES) if max_bytes > 0 else READ_FILE_MAX_BYTES
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return f"{display_name} is empty."
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if looks_binary(mm[:BINARY_SNIFF_BYTES]):
+                return f"{display_name} looks like a binary file ({size} bytes), not showing it."
+
+            # byte window, for minified bundles and other files with huge lines
+            if byte_offset >= 0:
+                start = min(byte_offset, size)
+                end = min(start + max_bytes, size)
+                text = mm[start:end].decode("utf-8", errors="replace")
+                header = f"{display_name} has {size} bytes, showing bytes {start}-{end}"
+                if end < size:
+                    header += f" (use byte_offset={end} to continue)"
+                return f"{header}\n{text}"
+
+            total_lines = _count_lines(mm)
+            start_line = max(start_line, 1)
+            if start_line > total_lines:
+                return (
+                    f"{display_name} has {total_lines} lines, "
+                    f"start_line={start_line} is past the end."
+                )
+            if end_line <= 0:
+                end_line = start_line + READ_FILE_DEFAULT_LINES - 1
+            end_line = min(max(end_line, start_line), total_lines)
+
+            start = _line_offset(mm, start_line)
+            window = mm[start:min(start + max_bytes, size)]
+            wanted = end_line - start_line + 1
+            lines = window.split(b"\n", wanted)
+            truncated_line = False
+            if len(lines) > wanted:
+                lines = lines[:wanted]
+            elif start + len(window) < size:
+                # byte cap hit inside a line, keep whole lines only
+                if len(lines) > 1:
+                    lines = lines[:-1]
+                else:
+                    truncated_line = True
+            shown_end = start_line + len(lines) - 1
+            text = b"\n".join(lines).decode("utf-8", errors="replace")
+
+    header = f"{display_name} has {total_lines} lines, showing {start_line}-{shown_end}"
+    if truncated_line:
+        header += f" (line {start_line} is cut at {max_bytes} bytes, use byte_offset to read it)"
+    elif shown_end < total_lines:
+        header += f" (use start_line={shown_end + 1} to continue)"
+    return f"{header}\n{text}"
@@ -0,0 +1,124 @@
+import asyncio
+import os
+import subprocess
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Tuple
+
+
+GIT_OUTPUT_MAX_BYTES = int(os.getenv("GIT_OUTPUT_MAX_BYTES", str(256 * 1024)))
+GIT_MAX_CONCURRENCY = int(os.getenv("GIT_MAX_CONCURRENCY", "4"))
+GIT_CACHE_MAX_ENTRIES = int(os.getenv("GIT_CACHE_MAX_ENTRIES", "256"))
+GIT_READ_CHUNK_BYTES = 64 * 1024
+
+# caps number of concurrent git processes, a burst of tool calls queues here
+_git_semaphore = asyncio.Semaphore(GIT_MAX_CONCURRENCY)
+# (root, head sha, args) -> (output, truncated)
+_git_cache: OrderedDict[Tuple[str, str, Tuple[str, ...]], Tuple[str, bool]] = OrderedDict()
+
+
+async def run_git(args: Tuple[str, ...], max_bytes: int = GIT_OUTPUT_MAX_BYTES) -> Tuple[str, bool]:
+    # stdout is streamed and cut at max_bytes, the process is killed instead of
+    # buffering e.g. a multi-MB "git log -p" of a vendored file
+    async with _git_semaphore:
+        proc = await asyncio.create_subprocess_exec(
+            "git", *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        # stderr is drained concurrently, a full stderr pipe would stall git
+        stderr_task = asyncio.ensure_future(proc.stderr.read())
+        chunks = []
+        size = 0
+        truncated = False
+        finished = False
+        try:
+            while True:
+                chunk = await proc.stdout.read(GIT_READ_CHUNK_BYTES)
+                if not chunk:
+                    finished = True
+                    break
+                if size + len(chunk) > max_bytes:
+                    chunks.append(chunk[:max_bytes - size])
+                    truncated = True
+                    break
+                chunks.append(chunk)
+                size += len(chunk)
+        finally:
+            # also reached when the tool call is cancelled mid-read
+            if not finished and proc.returncode is None:
+                proc.kill()
+            stderr = await stderr_task
+            await proc.wait()
+        if not truncated and proc.returncode != 0:
+            raise subprocess.CalledProcessError(
+                proc.returncode, ["git", *args], stderr=stderr.decode(errors="replace")
+            )
+        return b"".join(chunks).decode(errors="replace"), truncated
+
+
+def _find_git_dir(root: Path) -> Optional[Path]:
+    for directory in (root, *root.parents):
+        candidate = directory / ".git"
+        if candidate.is_dir():
+            return candidate
+        if candidate.is_file():
+            # worktrees and submodules keep "gitdir: <path>" in a .git file
+            content = candidate.read_text().strip()
+            if content.startswith("gitdir: "):
+                return (directory / content[len("gitdir: "):]).resolve()
+            return None
+    return None
+
+
+def _read_head_sha(git_dir: Path) -> Optional[str]:
+    head = (git_dir / "HEAD").read_text().strip()
+    if not head.startswith("ref: "):
+        return head
+    ref = head[len("ref: "):]
+    ref_path = git_dir / ref
+    if ref_path.is_file():
+        return ref_path.read_text().strip()
+    packed_refs = git_dir / "packed-refs"
+    if packed_refs.is_file():
+        for line in packed_refs.read_text().splitlines():
+            sha, _, name = line.partition(" ")
+            if name == ref:
+                return sha
+    return None
+
+
+async def get_head_sha(root: Path) -> Optional[str]:
+    # reading .git/HEAD directly keeps cache hits free of any process spawn,
+    # rev-parse is the fallback for layouts the reader does not understand
+    try:
+        git_dir = _find_git_dir(root)
+        if git_dir is not None:
+            sha = _read_head_sha(git_dir)
+            if sha:
+                return sha
+    except OSError:
+        pass
+    try:
+        output, _ = await run_git(("rev-parse", "HEAD"))
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return None
+    return output.strip() or None
+
+
+async def cached_git(args: Tuple[str, ...]) -> Tuple[str, bool]:
+    # history output only changes with a new commit, so HEAD sha is a full cache key
+    root = Path.cwd().resolve()
+    head = await get_head_sha(root)
+    if head is None:
+        return await run_git(args)
+    key = (str(root), head, args)
+    cached = _git_cache.get(key)
+    if cached is not None:
+        _git_cache.move_to_end(key)
+        return cached
+    result = await run_git(args)
+    _git_cache[key] = result
+    while len(_git_cache) > GIT_CACHE_MAX_ENTRIES:
+        _git_cache.popitem(last=False)
+    return result
@@ -0,0 +1,203 @@
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+# ignore files read at the repository root, nested directories only follow .gitignore
+ROOT_IGNORE_FILES = (".gitignore", ".dockerignore")
+# git itself never lists its own directory
+BUILTIN_PATTERNS = (".git/",)
+
+
+def _translate_segment(segment: str) -> str:
+    # glob of a single path segment to regex, "*" and "?" never match "/"
+    i, n = 0, len(segment)
+    out = []
+    while i < n:
+        c = segment[i]
+        if c == "*":
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(segment[i]))
+        elif c == "[":
+            # "]" right after the opening bracket (or its negation) is a literal
+            end = segment.find("]", i + 3 if segment[i + 1:i + 2] in ("!", "^") else i + 2)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = segment[i + 1:end]
+                if body[:1] in ("!", "^"):
+                    body = "^" + body[1:]
+                out.append(f"[{body.replace(chr(92), chr(92) * 2)}]")
+                i = end
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+def compile_pattern(pattern: str) -> Optional[Tuple[str, bool, bool]]:
+    # gitignore pattern to (regex over path relative to the ignore file dir, negated, dir_only)
+    if pattern.endswith("\\ "):
+        pattern = pattern[:-2].rstrip() + " "
+    else:
+        pattern = pattern.rstrip()
+    if not pattern or pattern.startswith("#"):
+        return None
+    negated = pattern.startswith("!")
+    if negated:
+        pattern = pattern[1:]
+    elif pattern.startswith("\\!") or pattern.startswith("\\#"):
+        pattern = pattern[1:]
+    dir_only = pattern.endswith("/")
+    pattern = pattern.rstrip("/")
+    if not pattern:
+        return None
+
+    # pattern with a slash (except trailing one) is relative to the ignore file dir,
+    # otherwise it matches a name at any depth
+    anchored = "/" in pattern
+    pattern = pattern.lstrip("/")
+    parts = pattern.split("/")
+    regex = []
+    for i, part in enumerate(parts):
+        is_last = i == len(parts) - 1
+        if part == "**":
+            regex.append(".*" if is_last else "(?:[^/]+/)*")
+        else:
+            regex.append(_translate_segment(part) + ("" if is_last else "/"))
+    body = "".join(regex)
+    if not anchored:
+        body = "(?:.*/)?" + body
+    return body, negated, dir_only
+
+
+# compiled rules of one ignore file. consecutive rules with the same polarity are merged
+# into one regex, blocks are checked from the last one, so the last matching rule wins
+class IgnoreMatcher:
+    def __init__(self, base: str, patterns: List[str], parent: Optional["IgnoreMatcher"] = None):
+        self.base = base
+        self.parent = parent
+        rules = [rule for rule in map(compile_pattern, patterns) if rule is not None]
+        self.blocks = []
+        start = 0
+        for end in range(1, len(rules) + 1):
+            if end == len(rules) or rules[end][1] != rules[start][1]:
+                block = rules[start:end]
+                file_regexes = [regex for regex, _, dir_only in block if not dir_only]
+                dir_regexes = [regex for regex, _, _ in block]
+                self.blocks.append((
+                    block[0][1],
+                    re.compile(f"(?:{'|'.join(file_regexes)})$") if file_regexes else None,
+                    re.compile(f"(?:{'|'.join(dir_regexes)})$"),
+                ))
+                start = end
+
+    def match(self, rel: str, is_dir: bool) -> Optional[bool]:
+        # True - ignored, False - re-included by negation, None - no rule matched
+        for negated, file_regex, dir_regex in reversed(self.blocks):
+            regex = dir_regex if is_dir else file_regex
+            if regex is not None and regex.match(rel):
+                return not negated
+        return None
+
+
+def _file_mtime(path: Path) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class RepoIgnore:
+    # follows nested .gitignore files, every directory gets a chain of matchers
+    # from the deepest ignore file up to the root one. results are memoized for as
+    # long as none of the ignore files consulted so far changes
+    def __init__(self, root: Path):
+        self.root = root
+        self._matchers: Dict[str, Optional[IgnoreMatcher]] = {}
+        self._ignored: Dict[Tuple[str, bool], bool] = {}
+        # every ignore file looked for -> its mtime, None when it did not exist
+        self._sources: Dict[Path, Optional[int]] = {}
+        self._lock = threading.Lock()
+
+    def is_stale(self) -> bool:
+        with self._lock:
+            sources = list(self._sources.items())
+        return any(_file_mtime(path) != mtime for path, mtime in sources)
+
+    def _read_patterns(self, dir_rel: str) -> Optional[List[str]]:
+        names = ROOT_IGNORE_FILES if dir_rel == "." else (".gitignore",)
+        patterns = None
+        for name in names:
+            ignore_path = self.root / dir_rel / name
+            # taken before reading, an edit in between makes the snapshot stale next time
+            self._sources[ignore_path] = _file_mtime(ignore_path)
+            try:
+                with open(ignore_path, "r", encoding="utf-8") as f:
+                    patterns = (patterns or []) + f.read().splitlines()
+            except (OSError, UnicodeDecodeError):
+                continue
+        return patterns
+
+    def _matcher_for(self, dir_rel: str) -> Optional[IgnoreMatcher]:
+        if dir_rel in self._matchers:
+            return self._matchers[dir_rel]
+        if dir_rel == ".":
+            parent = None
+            patterns = list(BUILTIN_PATTERNS) + (self._read_patterns(".") or [])
+        else:
+            parent = self._matcher_for(dir_rel.rpartition("/")[0] or ".")
+            patterns = self._read_patterns(dir_rel)
+        matcher = IgnoreMatcher(dir_rel, patterns, parent) if patterns else parent
+        self._matchers[dir_rel] = matcher
+        return matcher
+
+    def _decide(self, rel: str, is_dir: bool) -> bool:
+        parent_rel = rel.rpartition("/")[0]
+        # nothing inside an ignored directory can be re-included
+        if parent_rel and self._is_ignored(parent_rel, True):
+            return True
+        matcher = self._matcher_for(parent_rel or ".")
+        while matcher is not None:
+            sub_rel = rel if matcher.base == "." else rel[len(matcher.base) + 1:]
+            decision = matcher.match(sub_rel, is_dir)
+            if decision is not None:
+                return decision
+            matcher = matcher.parent
+        return False
+
+    def _is_ignored(self, rel: str, is_dir: bool) -> bool:
+        key = (rel, is_dir)
+        result = self._ignored.get(key)
+        if result is None:
+            result = self._decide(rel, is_dir)
+            self._ignored[key] = result
+        return result
+
+    def is_ignored(self, rel: str, is_dir: bool) -> bool:
+        # rel is a posix path relative to the root, without leading "./"
+        if rel in ("", "."):
+            return False
+        with self._lock:
+            return self._is_ignored(rel, is_dir)
+
+
+_repo_ignores: Dict[Path, RepoIgnore] = {}
+_repo_ignores_lock = threading.Lock()
+
+
+def get_repo_ignore(root: Path) -> RepoIgnore:
+    # memoized matches survive between tool calls, the matcher is rebuilt only when
+    # an ignore file it has read (or looked for) is changed, added or removed
+    with _repo_ignores_lock:
+        ignore = _repo_ignores.get(root)
+        if ignore is None or ignore.is_stale():
+            ignore = RepoIgnore(root)
+            _repo_ignores[root] = ignore
+        return ignore
@@ -0,0 +1,407 @@
+import argparse
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+from array import array
+from collections import Counter, defaultdict
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # vector search is optional
+    np = None
+
+
+# offline index over arxiv metadata dump (jsonl with id, title, abstract, categories),
+# made of immutable segments, every build from new dump files appends a segment.
+# all segment files are memory-mapped, so opening the index costs almost nothing
+PAPER_INDEX_DIR = Path(os.getenv("PAPER_INDEX_DIR", ".cache/paper_index"))
+PAPER_INDEX_SEGMENT_DOCS = int(os.getenv("PAPER_INDEX_SEGMENT_DOCS", "200000"))
+# terms present in more than this share of documents are skipped, they barely change
+# bm25 ranking but their postings lists dominate query time
+PAPER_INDEX_MAX_DF_RATIO = float(os.getenv("PAPER_INDEX_MAX_DF_RATIO", "0.2"))
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+RRF_K = 60
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can for from has have in into is it its of on or our "
+    "that the their this to using we which with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN.findall(text.lower()) if len(t) > 1 and t not in _STOPWORDS]
+
+
+def _document_text(doc: dict) -> str:
+    return f"{doc['title']}. {doc['abstract']}"
+
+
+def _mmap_bytes(path: Path):
+    if not path.exists() or path.stat().st_size == 0:
+        return b""
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _mmap_array(path: Path, typecode: str) -> memoryview:
+    return memoryview(_mmap_bytes(path)).cast(typecode)
+
+
+class _Segment:
+    def __init__(self, path: Path):
+        self.path = path
+        self.docs = _mmap_bytes(path / "docs.jsonl")
+        self.doc_offsets = _mmap_array(path / "docs.idx", "Q")
+        self.lengths = _mmap_array(path / "doclen.bin", "I")
+        self.terms = _mmap_bytes(path / "terms.txt")
+        self.term_offsets = _mmap_array(path / "terms.idx", "Q")
+        # flat pairs of (doc id, term frequency)
+        self.postings = _mmap_array(path / "postings.bin", "I")
+        self.num_docs = len(self.lengths)
+        if np is not None:
+            # zero-copy views of the same mmapped files for vectorized scoring
+            self.postings_np = np.frombuffer(self.postings, dtype=np.uint32).reshape(-1, 2)
+            self.lengths_np = np.frombuffer(self.lengths, dtype=np.uint32)
+        vectors_path = path / "vectors.f32"
+        self.vectors = None
+        if np is not None and vectors_path.exists():
+            self.vectors = np.frombuffer(_mmap_bytes(vectors_path), dtype=np.float32)
+
+    def _term_at(self, i: int) -> tuple[str, int, int]:
+        start = self.term_offsets[i]
+        end = self.terms.find(b"\n", start)
+        term, df, offset = self.terms[start:end].decode().split("\t")
+        return term, int(df), int(offset)
+
+    def lookup(self, term: str) -> Optional[tuple[int, int]]:
+        # binary search over sorted term dictionary, returns (df, postings offset)
+        lo, hi = 0, len(self.term_offsets)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            mid_term, df, offset = self._term_at(mid)
+            if mid_term == term:
+                return df, offset
+            if mid_term < term:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def document(self, doc_id: int) -> dict:
+        start, end = self.doc_offsets[doc_id], self.doc_offsets[doc_id + 1]
+        return json.loads(self.docs[start:end])
+
+
+class PaperIndex:
+    def __init__(self, index_dir: Path = PAPER_INDEX_DIR):
+        self.index_dir = Path(index_dir)
+        manifest = json.loads((self.index_dir / "manifest.json").read_text())
+        self.segments = [_Segment(self.index_dir / name) for name in manifest["segments"]]
+        self.num_docs = manifest["num_docs"]
+        self.avg_length = manifest["total_length"] / max(1, self.num_docs)
+        self.vector_dim = manifest.get("vector_dim")
+
+    def search_bm25(self, query: str, k: int) -> List[tuple[float, int, int]]:
+        terms = []
+        for term in set(tokenize(query)):
+            found = [(segment_idx, hit) for segment_idx, segment in enumerate(self.segments)
+                     if (hit := segment.lookup(term)) is not None]
+            df = sum(hit[0] for _, hit in found)
+            if df:
+                terms.append((df, found))
+        frequent_df = PAPER_INDEX_MAX_DF_RATIO * self.num_docs
+        if any(df <= frequent_df for df, _ in terms):
+            terms = [(df, found) for df, found in terms if df <= frequent_df]
+
+        if np is not None:
+            return self._score_bm25_numpy(terms, k)
+        scores = defaultdict(float)
+        for df, found in terms:
+            idf = self._idf(df)
+            for segment_idx, (segment_df, offset) in found:
+                segment = self.segments[segment_idx]
+                postings = segment.postings[offset:offset + 2 * segment_df]
+                lengths = segment.lengths
+                for i in range(0, len(postings), 2):
+                    doc_id, tf = postings[i], postings[i + 1]
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[doc_id] / self.avg_length)
+                    scores[(segment_idx, doc_id)] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+        top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(score, segment_idx, doc_id) for (segment_idx, doc_id), score in top]
+
+    def _idf(self, df: int) -> float:
+        return math.log(1 + (self.num_docs - df + 0.5) / (df + 0.5))
+
+    def _score_bm25_numpy(self, terms, k: int) -> List[tuple[float, int, int]]:
+        # same scores as the loop above, one array operation per postings list
+        # instead of one python iteration per posting
+        segment_scores = {}
+        for df, found in terms:
+            idf = self._idf(df)
+            for segment_idx, (segment_df, offset) in found:
+                segment = self.segments[segment_idx]
+                pairs = segment.postings_np[offset // 2:offset // 2 + segment_df]
+                doc_ids = pairs[:, 0]
+                tf = pairs[:, 1].astype(np.float64)
+                lengths = segment.lengths_np[doc_ids]
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / self.avg_length)
+                scores = segment_scores.get(segment_idx)
+                if scores is None:
+                    scores = segment_scores[segment_idx] = np.zeros(segment.num_docs)
+                np.add.at(scores, doc_ids, idf * tf * (BM25_K1 + 1) / (tf + norm))
+
+        hits = []
+        for segment_idx, scores in segment_scores.items():
+            candidates = np.flatnonzero(scores)
+            if len(candidates) > k:
+                candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+            hits.extend((float(scores[doc_id]), segment_idx, int(doc_id)) for doc_id in candidates)
+        return heapq.nlargest(k, hits)
+
+    def search_vector(self, query_vector: Sequence[float], k: int) -> List[tuple[float, int, int]]:
+        if np is None or not self.vector_dim:
+            return []
+        query = np.asarray(query_vector, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+        hits = []
+        for segment_idx, segment in enumerate(self.segments):
+            if segment.vectors is None or not segment.num_docs:
+                continue
+            scores = segment.vectors.reshape(segment.num_docs, self.vector_dim) @ query
+            top = np.argpartition(-scores, min(k, len(scores) - 1))[:k]
+            hits.extend((float(scores[doc_id]), segment_idx, int(doc_id)) for doc_id in top)
+        return heapq.nlargest(k, hits)
+
+    def search(
+        self, query: str, k: int = 5, query_vector: Optional[Sequence[float]] = None
+    ) -> List[dict]:
+        rankings = [self.search_bm25(query, k * 4)]
+        if query_vector is not None:
+            rankings.append(self.search_vector(query_vector, k * 4))
+        # reciprocal rank fusion, with a single ranking it keeps bm25 order
+        fused = defaultdict(float)
+        for ranking in rankings:
+            for rank, (_, segment_idx, doc_id) in enumerate(ranking):
+                fused[(segment_idx, doc_id)] += 1 / (RRF_K + rank + 1)
+        top = heapq.nlargest(k, fused.items(), key=lambda item: item[1])
+        return [self.segments[segment_idx].document(doc_id) for (segment_idx, doc_id), _ in top]
+
+
+_paper_index: Optional[PaperIndex] = None
+_paper_index_mtime: Optional[float] = None
+
+
+def get_paper_index(index_dir: Path = PAPER_INDEX_DIR) -> Optional[PaperIndex]:
+    # reopened when manifest changes, so incremental builds are picked up by running app
+    global _paper_index, _paper_index_mtime
+    manifest_path = Path(index_dir) / "manifest.json"
+    if not manifest_path.exists():
+        return None
+    mtime = manifest_path.stat().st_mtime
+    if _paper_index is None or _paper_index_mtime != mtime:
+        _paper_index = PaperIndex(index_dir)
+        _paper_index_mtime = mtime
+    return _paper_index
+
+
+@lru_cache(maxsize=1)
+def get_embeddings():
+    model_name = os.getenv("PAPER_INDEX_EMBEDDING_MODEL")
+    if not model_name:
+        return None
+    from langchain_openai import OpenAIEmbeddings
+
+    return OpenAIEmbeddings(
+        model=model_name,
+        base_url=os.getenv("OPENAI_API_BASE"),
+        api_key=os.getenv("OPENAI_API_KEY"),
+        # non-openai models (vllm) have their own tokenizers
+        check_embedding_ctx_length=False,
+    )
+
+
+def _iter_dump(path: Path) -> Iterator[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if not record.get("id") or not record.get("title"):
+                continue
+            yield {
+                "id": str(record["id"]),
+                "title": " ".join(record["title"].split()),
+                "abstract": " ".join((record.get("abstract") or "").split()),
+                "categories": record.get("categories") or "",
+            }
+
+
+def _write_segment(
+    segment_dir: Path,
+    docs: List[dict],
+    embed_documents: Optional[Callable[[List[str]], List[List[float]]]] = None,
+) -> tuple[int, Optional[int]]:
+    segment_dir.mkdir(parents=True, exist_ok=True)
+    postings = defaultdict(lambda: array("I"))
+    doc_offsets = array("Q")
+    lengths = array("I")
+    with open(segment_dir / "docs.jsonl", "wb") as f:
+        for doc_id, doc in enumerate(docs):
+            doc_offsets.append(f.tell())
+            f.write(json.dumps(doc, ensure_ascii=False).encode() + b"\n")
+            # title tokens are counted twice as a cheap field boost
+            tokens = tokenize(doc["title"]) * 2 + tokenize(doc["abstract"])
+            lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                postings[term].extend((doc_id, tf))
+        doc_offsets.append(f.tell())
+
+    term_offsets = array("Q")
+    with open(segment_dir / "postings.bin", "wb") as postings_file, \
+            open(segment_dir / "terms.txt", "wb") as terms_file:
+        position = 0
+        for term in sorted(postings):
+            term_postings = postings[term]
+            term_offsets.append(terms_file.tell())
+            terms_file.write(f"{term}\t{len(term_postings) // 2}\t{position}\n".encode())
+            term_postings.tofile(postings_file)
+            position += len(term_postings)
+
+    for name, values in (
+        ("docs.idx", doc_offsets),
+        ("doclen.bin", lengths),
+        ("terms.idx", term_offsets),
+    ):
+        with open(segment_dir / name, "wb") as f:
+            values.tofile(f)
+    (segment_dir / "ids.txt").write_text("\n".join(doc["id"] for doc in docs))
+
+    vector_dim = None
+    if embed_documents is not None:
+        with open(segment_dir / "vectors.f32", "wb") as f:
+            for start in range(0, len(docs), 256):
+                batch = [_document_text(doc)[:2000] for doc in docs[start:start + 256]]
+                for vector in embed_documents(batch):
+                    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+                    array("f", (v / norm for v in vector)).tofile(f)
+                    vector_dim = len(vector)
+    return sum(lengths), vector_dim
+
+
+def build_index(
+    dump_paths: Iterable[Path],
+    index_dir: Path = PAPER_INDEX_DIR,
+    embed_documents: Optional[Callable[[List[str]], List[List[float]]]] = None,
+    segment_docs: int = PAPER_INDEX_SEGMENT_DOCS,
+) -> dict:
+    # incremental: dump files already indexed (same size and mtime) are skipped,
+    # papers already present in the index are not added again
+    index_dir = Path(index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = index_dir / "manifest.json"
+    manifest = {"segments": [], "sources": {}, "num_docs": 0, "total_length": 0, "vector_dim": None}
+    if manifest_path.exists():
+        manifest = json.loads(manifest_path.read_text())
+
+    known_ids = set()
+    for name in manifest["segments"]:
+        known_ids.update((index_dir / name / "ids.txt").read_text().split("\n"))
+
+    added_docs = 0
+    pending = []
+
+    def flush():
+        nonlocal added_docs
+        if not pending:
+            return
+        name = f"segment-{len(manifest['segments']):06d}"
+        total_length, vector_dim = _write_segment(index_dir / name, pending, embed_documents)
+        manifest["segments"].append(name)
+        manifest["num_docs"] += len(pending)
+        manifest["total_length"] += total_length
+        manifest["vector_dim"] = vector_dim or manifest.get("vector_dim")
+        added_docs += len(pending)
+        pending.clear()
+        # manifest is replaced atomically, readers never see a half-written index
+        tmp_path = manifest_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(manifest))
+        tmp_path.replace(manifest_path)
+
+    for dump_path in dump_paths:
+        dump_path = Path(dump_path).resolve()
+        stat = dump_path.stat()
+        source = {"size": stat.st_size, "mtime": stat.st_mtime}
+        if manifest["sources"].get(str(dump_path)) == source:
+            continue
+        for doc in _iter_dump(dump_path):
+            if doc["id"] in known_ids:
+                continue
+            known_ids.add(doc["id"])
+            pending.append(doc)
+            if len(pending) >= segment_docs:
+                flush()
+        manifest["sources"][str(dump_path)] = source
+        flush()
+
+    return {
+        "added_docs": added_docs,
+        "num_docs": manifest["num_docs"],
+        "segments": len(manifest["segments"]),
+    }
+
+
+def format_papers(papers: List[dict]) -> str:
+    entries = []
+    for paper in papers:
+        entries.append(
+            f"Title: {paper['title']}\narXiv: {paper['id']} ({paper['categories']})\n"
+            f"Summary: {paper['abstract']}"
+        )
+    return "\n\n".join(entries) if entries else "No results found."
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Local arXiv metadata index")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser(
+        "build", help="index new arxiv metadata dump files (jsonl)"
+    )
+    build_parser.add_argument("dumps", nargs="+", type=Path)
+    build_parser.add_argument("--index-dir", type=Path, default=PAPER_INDEX_DIR)
+    build_parser.add_argument("--embeddings", action="store_true",
+                              help="also store vectors from PAPER_INDEX_EMBEDDING_MODEL")
+    search_parser = subparsers.add_parser("search", help="query the index")
+    search_parser.add_argument("query")
+    search_parser.add_argument("--index-dir", type=Path, default=PAPER_INDEX_DIR)
+    search_parser.add_argument("-k", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        embeddings = get_embeddings() if args.embeddings else None
+        if args.embeddings and embeddings is None:
+            parser.error("PAPER_INDEX_EMBEDDING_MODEL is not set")
+        report = build_index(
+            args.dumps, args.index_dir, embeddings.embed_documents if embeddings else None
+        )
+        print(
+            f"added {report['added_docs']} papers, "
+            f"{report['num_docs']} in {report['segments']} segments"
+        )
+    else:
+        index = get_paper_index(args.index_dir)
+        if index is None:
+            parser.error(f"no index in {args.index_dir}")
+        print(format_papers(index.search(args.query, args.k)))
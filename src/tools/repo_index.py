@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from .gitignore import get_repo_ignore
+
+
+REPO_INDEX_DIR = Path(os.getenv("REPO_INDEX_DIR", ".cache/repo_index"))
+# listing of a directory is trusted without even a stat for this long
+REPO_INDEX_REFRESH_SECONDS = float(os.getenv("REPO_INDEX_REFRESH_SECONDS", "2"))
+
+Entry = Tuple[str, bool]
+
+
+# persistent per-root index of directory listings. directories are scanned lazily,
+# only when some tool looks into them, and rescanned only when their mtime changes
+# (adding, removing or renaming an entry always bumps mtime of its parent directory),
+# so on a large repository a listing costs one stat per visited directory instead of a walk
+class RepoTreeIndex:
+    def __init__(self, root: Path):
+        self.root = root
+        root_hash = hashlib.sha256(str(root).encode()).hexdigest()[:16]
+        self.cache_path = REPO_INDEX_DIR / f"{root_hash}.json"
+        # relative dir path -> (mtime_ns, sorted entries)
+        self._dirs: Dict[str, Tuple[int, List[Entry]]] = {}
+        self._checked_at: Dict[str, float] = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.cache_path.read_text())
+        except (OSError, ValueError):
+            return
+        if data.get("root") != str(self.root):
+            return
+        self._dirs = {
+            rel: (mtime, [(name, is_dir) for name, is_dir in entries])
+            for rel, (mtime, entries) in data["dirs"].items()
+        }
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            dirs = dict(self._dirs)
+            self._dirty = False
+        REPO_INDEX_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({"root": str(self.root), "dirs": dirs}))
+        tmp_path.replace(self.cache_path)
+
+    def _scan(self, path: Path) -> List[Entry]:
+        entries = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        # symlinked dirs are not followed, they may point outside or loop
+                        entries.append((entry.name, entry.is_dir(follow_symlinks=False)))
+                    except OSError:
+                        continue
+        except (PermissionError, FileNotFoundError, NotADirectoryError):
+            return []
+        entries.sort(key=lambda e: (not e[1], e[0]))
+        return entries
+
+    def entries(self, rel: str = ".") -> List[Entry]:
+        # directories first, then files, both sorted by name
+        now = time.monotonic()
+        with self._lock:
+            cached = self._dirs.get(rel)
+            if (
+                cached is not None
+                and now - self._checked_at.get(rel, float("-inf")) < REPO_INDEX_REFRESH_SECONDS
+            ):
+                return cached[1]
+
+        path = self.root / rel
+        try:
+            mtime = path.stat().st_mtime_ns
+        except OSError:
+            with self._lock:
+                if self._dirs.pop(rel, None) is not None:
+                    self._dirty = True
+            return []
+
+        if cached is not None and cached[0] == mtime:
+            entries = cached[1]
+        else:
+            entries = self._scan(path)
+            with self._lock:
+                self._dirs[rel] = (mtime, entries)
+                self._dirty = True
+        with self._lock:
+            self._checked_at[rel] = now
+        return entries
+
+
+_repo_indexes: Dict[Path, RepoTreeIndex] = {}
+_repo_indexes_lock = threading.Lock()
+
+
+def get_repo_index(root: Path) -> RepoTreeIndex:
+    with _repo_indexes_lock:
+        index = _repo_indexes.get(root)
+        if index is None:
+            index = RepoTreeIndex(root)
+            _repo_indexes[root] = index
+        return index
+
+
+def project_files(root: Path, suffix: str = "") -> List[str]:
+    # relative paths of all files list_directory would show, walked through the tree index
+    index = get_repo_index(root)
+    ignore = get_repo_ignore(root)
+    files = []
+    stack = ["."]
+    while stack:
+        rel_dir = stack.pop()
+        for name, is_dir in index.entries(rel_dir):
+            rel = name if rel_dir == "." else f"{rel_dir}/{name}"
+            if ignore.is_ignored(rel, is_dir):
+                continue
+            if is_dir:
+                stack.append(rel)
+            elif name.endswith(suffix):
+                files.append(rel)
+    return files
@@ -1,31 +1,151 @@
 import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Optional
 
 import arxiv
 from langchain.tools import tool
 
+from src.database import fetch_arxiv_results, upload_arxiv_results
+
+from .paper_index import format_papers, get_embeddings, get_paper_index
+
+
+ARXIV_DELAY_SECONDS = float(os.getenv("ARXIV_DELAY_SECONDS", "3"))
+ARXIV_CACHE_TTL_SECONDS = float(os.getenv("ARXIV_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+# empty answers are often transient (api hiccups, fresh topics), they are reused briefly
+ARXIV_EMPTY_CACHE_TTL_SECONDS = float(os.getenv("ARXIV_EMPTY_CACHE_TTL_SECONDS", "3600"))
+# allows pointing the client to a local stand-in server, e.g. "http://localhost:8081/api/query?{}"
+ARXIV_API_URL = os.getenv("ARXIV_API_URL")
+ARXIV_MAX_RESULTS = 2
+ARXIV_CACHE_DIR = Path(os.getenv("LONG_TERM_MEMORY_DIR", ".cache/agent_memory")) / "arxiv"
+NO_RESULTS = "No results found."
+
+
+# arxiv asks for one request at a time with a few seconds between them,
+# the limiter is shared by all concurrent requests of the process
+class AsyncRateLimiter:
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._lock = asyncio.Lock()
+        self._last_call = 0.0
+
+    @asynccontextmanager
+    async def acquire(self):
+        async with self._lock:
+            delay = self._last_call + self.min_interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                yield
+            finally:
+                self._last_call = time.monotonic()
+
+
+_arxiv_client: Optional[arxiv.Client] = None
+_arxiv_rate_limiter = AsyncRateLimiter(ARXIV_DELAY_SECONDS)
+
+
+def get_arxiv_client() -> arxiv.Client:
+    global _arxiv_client
+    if _arxiv_client is None:
+        # client delay still applies between its own retries
+        _arxiv_client = arxiv.Client(
+            page_size = 3,
+            delay_seconds = ARXIV_DELAY_SECONDS,
+            num_retries = 5
+        )
+        if ARXIV_API_URL:
+            _arxiv_client.query_url_format = ARXIV_API_URL
+    return _arxiv_client
+
+
+def get_query_key(query: str, max_results: int = ARXIV_MAX_RESULTS) -> str:
+    normalized = re.sub(r"\s+", " ", query).strip().lower()
+    return hashlib.sha256(f"{max_results}:{normalized}".encode()).hexdigest()
+
+
+def _read_local_results(query_key: str) -> Optional[str]:
+    cache_file = ARXIV_CACHE_DIR / f"{query_key}.json"
+    if not cache_file.exists():
+        return None
+    entry = json.loads(cache_file.read_text())
+    empty = entry["results"] == NO_RESULTS
+    ttl = ARXIV_EMPTY_CACHE_TTL_SECONDS if empty else ARXIV_CACHE_TTL_SECONDS
+    if time.time() - entry["created_at"] > ttl:
+        return None
+    return entry["results"]
+
+
+def _write_local_results(query_key: str, query: str, results: str) -> None:
+    ARXIV_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    cache_file = ARXIV_CACHE_DIR / f"{query_key}.json"
+    cache_file.write_text(json.dumps({"query": query, "results": results, "created_at": time.time()}))
+
+
+async def recall_arxiv_results(query_key: str) -> Optional[str]:
+    if os.getenv("DATABASE_URL"):
+        results = await fetch_arxiv_results(query_key, ARXIV_CACHE_TTL_SECONDS)
+        if results == NO_RESULTS:
+            results = await fetch_arxiv_results(query_key, ARXIV_EMPTY_CACHE_TTL_SECONDS)
+        return results
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(None, _read_local_results, query_key)
+
+
+async def memorize_arxiv_results(query_key: str, query: str, results: str) -> None:
+    if os.getenv("DATABASE_URL"):
+        await upload_arxiv_results(query_key, query, results)
+        return
+    loop = asyncio.get_event_loop()
+    await loop.run_in_executor(None, _write_local_results, query_key, query, results)
+
 
 # TODO: check whether arxiv lib has async client
 @tool
 async def search_arxiv(query: str) -> str:
     """Search arXiv for papers matching the query."""
+    query_key = get_query_key(query)
+    cached_results = await recall_arxiv_results(query_key)
+    if cached_results is not None:
+        return cached_results
+
     loop = asyncio.get_event_loop()
-    client = arxiv.Client(
-        page_size = 3,
-        delay_seconds = 3,
-        num_retries = 5
-    )
+    client = get_arxiv_client()
     search = arxiv.Search(
         query=query,
-        max_results=2,
+        max_results=ARXIV_MAX_RESULTS,
         sort_by=arxiv.SortCriterion.Relevance,
     )
     entries = []
     def get_results():
         return list(client.results(search))
-    results = await loop.run_in_executor(None, get_results)
+    async with _arxiv_rate_limiter.acquire():
+        results = await loop.run_in_executor(None, get_results)
     for result in results:
         summary = result.summary.strip().replace("\n", " ")
         entries.append(f"Title: {result.title}\nSummary: {summary}")
-    if not entries:
-        return "No results found."
-    return "\n\n".join(entries)
+    output = "\n\n".join(entries) if entries else NO_RESULTS
+    await memorize_arxiv_results(query_key, query, output)
+    return output
+
+
+@tool
+async def search_local_papers(query: str, max_results: int = 5) -> str:
+    """Search the local offline index of arXiv papers (titles, abstracts, categories) matching the query."""
+    loop = asyncio.get_event_loop()
+    index = await loop.run_in_executor(None, get_paper_index)
+    if index is None:
+        return "Local paper index is not built."
+    max_results = min(max(max_results, 1), 20)
+    query_vector = None
+    embeddings = get_embeddings() if index.vector_dim else None
+    if embeddings is not None:
+        query_vector = await embeddings.aembed_query(query)
+    papers = await loop.run_in_executor(None, index.search, query, max_results, query_vector)
+    return format_papers(papers)
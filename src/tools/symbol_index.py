@@ -0,0 +1,243 @@
+import ast
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .repo_index import project_files
+
+
+SYMBOL_INDEX_WORKERS = int(os.getenv("SYMBOL_INDEX_WORKERS", str(os.cpu_count() or 1)))
+# below this many changed files parsing inline is cheaper than starting workers
+SYMBOL_INDEX_POOL_THRESHOLD = int(os.getenv("SYMBOL_INDEX_POOL_THRESHOLD", "64"))
+# full tree is checked for changed files at most this often
+SYMBOL_INDEX_REFRESH_SECONDS = float(os.getenv("SYMBOL_INDEX_REFRESH_SECONDS", "10"))
+SYMBOL_SEARCH_MAX_RESULTS = 20
+
+
+@dataclass(frozen=True)
+class Symbol:
+    name: str
+    qualname: str
+    kind: str
+    path: str
+    start_line: int
+    end_line: int
+    doc: str
+
+
+@dataclass
+class FileSymbols:
+    mtime_ns: int
+    size: int
+    content_hash: str
+    symbols: List[Symbol]
+
+
+def _first_doc_line(node: ast.AST) -> str:
+    doc = ast.get_docstring(node, clean=True) if isinstance(
+        node, (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)
+    ) else None
+    return doc.strip().splitlines()[0] if doc else ""
+
+
+def extract_symbols(rel: str, source: bytes) -> List[Symbol]:
+    tree = ast.parse(source, filename=rel)
+    module = rel[:-3].replace("/", ".")
+    if module.endswith(".__init__"):
+        module = module[: -len(".__init__")]
+    line_count = source.count(b"\n") + (0 if source.endswith(b"\n") else 1)
+    name = module.rpartition(".")[2]
+    symbols = [Symbol(name, module, "module", rel, 1, max(line_count, 1), _first_doc_line(tree))]
+
+    def visit(node: ast.AST, prefix: str) -> None:
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+                qualname = f"{prefix}{child.name}"
+                if isinstance(child, ast.ClassDef):
+                    kind = "class"
+                else:
+                    kind = "method" if prefix and isinstance(node, ast.ClassDef) else "function"
+                # decorators belong to the definition span
+                start = min([child.lineno] + [d.lineno for d in child.decorator_list])
+                doc = _first_doc_line(child)
+                symbols.append(
+                    Symbol(child.name, qualname, kind, rel, start, child.end_lineno, doc)
+                )
+                visit(child, f"{qualname}.")
+            elif node is tree and isinstance(child, (ast.Assign, ast.AnnAssign)):
+                targets = child.targets if isinstance(child, ast.Assign) else [child.target]
+                for target in targets:
+                    if isinstance(target, ast.Name):
+                        end = child.end_lineno
+                        symbols.append(
+                            Symbol(target.id, target.id, "variable", rel, child.lineno, end, "")
+                        )
+
+    visit(tree, "")
+    return symbols
+
+
+def parse_file(root: str, rel: str) -> Tuple[str, Optional[FileSymbols]]:
+    # runs in worker processes, so module level and picklable
+    path = os.path.join(root, rel)
+    try:
+        stat = os.stat(path)
+        with open(path, "rb") as f:
+            source = f.read()
+        symbols = extract_symbols(rel, source)
+    except (OSError, SyntaxError, ValueError):
+        return rel, None
+    return rel, FileSymbols(
+        stat.st_mtime_ns, stat.st_size, hashlib.sha1(source).hexdigest(), symbols
+    )
+
+
+# definitions of all python files of the repository. a file is reparsed only when
+# its mtime/size changed and its content hash differs from the indexed one
+class SymbolIndex:
+    def __init__(self, root: Path):
+        self.root = root
+        self._files: Dict[str, FileSymbols] = {}
+        self._by_name: Dict[str, List[Symbol]] = {}
+        self._refreshed_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def _changed(self, rel: str) -> bool:
+        indexed = self._files.get(rel)
+        if indexed is None:
+            return True
+        try:
+            stat = os.stat(self.root / rel)
+        except OSError:
+            return True
+        if stat.st_mtime_ns == indexed.mtime_ns and stat.st_size == indexed.size:
+            return False
+        try:
+            content_hash = hashlib.sha1((self.root / rel).read_bytes()).hexdigest()
+        except OSError:
+            return True
+        if content_hash == indexed.content_hash:
+            # touched but not modified
+            indexed.mtime_ns, indexed.size = stat.st_mtime_ns, stat.st_size
+            return False
+        return True
+
+    def _parse(self, rels: List[str]) -> Dict[str, Optional[FileSymbols]]:
+        root = str(self.root)
+        if len(rels) < SYMBOL_INDEX_POOL_THRESHOLD or SYMBOL_INDEX_WORKERS <= 1:
+            return dict(parse_file(root, rel) for rel in rels)
+        # spawn, forking a process with running event loop and threads is unsafe
+        with ProcessPoolExecutor(
+            max_workers=SYMBOL_INDEX_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            return dict(pool.map(parse_file, [root] * len(rels), rels, chunksize=16))
+
+    def _rebuild_names(self) -> None:
+        by_name: Dict[str, List[Symbol]] = {}
+        for file_symbols in self._files.values():
+            for symbol in file_symbols.symbols:
+                by_name.setdefault(symbol.name.lower(), []).append(symbol)
+        self._by_name = by_name
+
+    def _update(self, rels: List[str], removed: List[str]) -> None:
+        parsed = self._parse(rels) if rels else {}
+        for rel, file_symbols in parsed.items():
+            if file_symbols is None:
+                self._files.pop(rel, None)
+            else:
+                self._files[rel] = file_symbols
+        for rel in removed:
+            self._files.pop(rel, None)
+        if parsed or removed:
+            self._rebuild_names()
+
+    def refresh(self, force: bool = False) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._refreshed_at < SYMBOL_INDEX_REFRESH_SECONDS:
+                return
+            files = project_files(self.root, suffix=".py")
+            removed = set(self._files) - set(files)
+            self._update([rel for rel in files if self._changed(rel)], list(removed))
+            self._refreshed_at = now
+
+    def _fresh(self, symbols: List[Symbol]) -> bool:
+        # files of the returned symbols are always revalidated, even between full refreshes
+        stale = [rel for rel in dict.fromkeys(s.path for s in symbols) if self._changed(rel)]
+        if stale:
+            self._update(stale, [])
+        return not stale
+
+    def _lookup(self, name: str) -> List[Symbol]:
+        # "X", "Class.method" or "package.module" / "package.module.X"
+        key = name.strip()
+        last = key.rpartition(".")[2].lower()
+        candidates = self._by_name.get(last, [])
+        if "." in key:
+            matches = [
+                s
+                for s in candidates
+                if s.qualname == key
+                or s.qualname.endswith(f".{key}")
+                or f"{self._module(s)}.{s.qualname}" == key
+            ]
+        else:
+            matches = [s for s in candidates if s.name == key] or candidates
+        kinds = {"class": 0, "function": 1, "method": 2, "module": 3, "variable": 4}
+        return sorted(matches, key=lambda s: (kinds.get(s.kind, 5), s.path, s.start_line))
+
+    @staticmethod
+    def _module(symbol: Symbol) -> str:
+        module = symbol.path[:-3].replace("/", ".")
+        return module[: -len(".__init__")] if module.endswith(".__init__") else module
+
+    def find(self, name: str, path: str = "") -> List[Symbol]:
+        self.refresh()
+        with self._lock:
+            matches = self._lookup(name)
+            if path:
+                matches = [s for s in matches if s.path == path or s.path.endswith(f"/{path}")]
+            if matches and not self._fresh(matches):
+                matches = self._lookup(name)
+                if path:
+                    matches = [s for s in matches if s.path == path or s.path.endswith(f"/{path}")]
+            if not matches and "." not in name:
+                # no exact name, fall back to substring search over all names
+                needle = name.strip().lower()
+                matches = sorted(
+                    (s for key, symbols in self._by_name.items() if needle in key for s in symbols),
+                    key=lambda s: (len(s.name), s.path, s.start_line),
+                )
+            return matches[:SYMBOL_SEARCH_MAX_RESULTS]
+
+    def source(self, symbol: Symbol) -> str:
+        with open(self.root / symbol.path, "r", encoding="utf-8", errors="replace") as f:
+            lines = f.read().splitlines()
+        return "\n".join(lines[symbol.start_line - 1:symbol.end_line])
+
+
+_symbol_indexes: Dict[Path, SymbolIndex] = {}
+_symbol_indexes_lock = threading.Lock()
+
+
+def get_symbol_index(root: Path) -> SymbolIndex:
+    with _symbol_indexes_lock:
+        index = _symbol_indexes.get(root)
+        if index is None:
+            index = SymbolIndex(root)
+            _symbol_indexes[root] = index
+        return index
+
+
+async def warm_up_symbol_index(root: Optional[Path] = None) -> None:
+    # started in the background at application startup, first lookups wait on the lock
+    index = get_symbol_index(root or Path.cwd().resolve())
+    loop = asyncio.get_event_loop()
+    await loop.run_in_executor(None, index.refresh, True)
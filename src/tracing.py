@@ -0,0 +1,53 @@
+import os
+from typing import Any, Optional
+
+
+_tracer_provider: Optional[Any] = None
+
+
+def tracing_enabled() -> bool:
+    # read at call time, entrypoints load .env after their imports
+    return os.getenv("TRACING_ENABLED", "false").lower() in {"1", "true", "yes"}
+
+
+def setup_tracing() -> Optional[Any]:
+    # idempotent, returns the tracer provider or None when tracing is disabled.
+    # phoenix and otel are imported only here, disabled tracing costs nothing at startup
+    global _tracer_provider
+    if _tracer_provider is not None or not tracing_enabled():
+        return _tracer_provider
+
+    from openinference.instrumentation.langchain import LangChainInstrumentor
+    from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    from phoenix.otel import register
+
+    # head sampling: share of new traces that are recorded, child spans follow their parent
+    sample_ratio = float(os.getenv("TRACING_SAMPLE_RATIO", "1.0"))
+    # batch exporter sends spans from a background thread instead of one request per span
+    _tracer_provider = register(
+        project_name=os.getenv("TRACING_PROJECT_NAME", "aboba"),
+        # collector url, e.g. http://phoenix:6006/v1/traces; phoenix defaults apply when unset
+        endpoint=os.getenv("TRACING_ENDPOINT") or None,
+        batch=True,
+        auto_instrument=False,
+        verbose=False,
+        sampler=ParentBased(TraceIdRatioBased(sample_ratio)),
+    )
+    LangChainInstrumentor().instrument(tracer_provider=_tracer_provider)
+    HTTPXClientInstrumentor().instrument(tracer_provider=_tracer_provider)
+    return _tracer_provider
+
+
+def shutdown_tracing() -> None:
+    # flushes spans still queued in the batch processor
+    global _tracer_provider
+    if _tracer_provider is None:
+        return
+    from openinference.instrumentation.langchain import LangChainInstrumentor
+    from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
+
+    LangChainInstrumentor().uninstrument()
+    HTTPXClientInstrumentor().uninstrument()
+    _tracer_provider.shutdown()
+    _tracer_provider = None
@@ -0,0 +1,43 @@
+import random
+
+from src.agent.chunking import CHARS_PER_TOKEN, chunk_text
+
+MAX_TOKENS = 1500
+
+
+def make_module(num_functions: int = 80, seed: int = 1) -> list[str]:
+    rng = random.Random(seed)
+    functions = []
+    for i in range(num_functions):
+        body = "".join(
+            f"    value_{j} = compute_{i}({j}) + {rng.randint(0, 999)}\n"
+            for j in range(rng.randint(2, 25))
+        )
+        functions.append(f"def function_{i}(arg):\n{body}    return value_0\n\n\n")
+    return functions
+
+
+def edit_function(function: str) -> str:
+    return function.replace(
+        "    return value_0\n",
+        "    value_extra = arg * 2 + 1\n    value_more = value_extra - 3\n    return value_0\n",
+    )
+
+
+def test_chunks_cover_text_within_limit():
+    text = "import os\n\n\n" + "".join(make_module())
+    chunks = chunk_text(text, max_tokens=MAX_TOKENS)
+    assert len(chunks) > 3
+    assert "".join(chunks) == text
+    assert all(len(chunk) <= MAX_TOKENS * CHARS_PER_TOKEN for chunk in chunks)
+
+
+def test_editing_one_function_changes_one_chunk():
+    functions = make_module()
+    chunks = chunk_text("import os\n\n\n" + "".join(functions), max_tokens=MAX_TOKENS)
+    for i in range(len(functions)):
+        edited = functions[:i] + [edit_function(functions[i])] + functions[i + 1:]
+        new_chunks = chunk_text("import os\n\n\n" + "".join(edited), max_tokens=MAX_TOKENS)
+        # chunk summaries are memorized by chunk content, so these are the memory keys
+        assert len(set(new_chunks) - set(chunks)) == 1, f"editing function_{i}"
+        assert len(set(chunks) - set(new_chunks)) == 1, f"editing function_{i}"
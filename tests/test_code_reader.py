@@ -0,0 +1,68 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("langgraph")
+
+from langchain_core.messages import AIMessage  # noqa: E402
+
+from src.agent import devlead  # noqa: E402
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "good.py").write_text("def good():\n    return 1\n")
+    (tmp_path / "locked.py").write_text("secret = 1\n")
+    (tmp_path / "package").mkdir()
+    recalled, summarized = [], []
+
+    async def recall(contents, use_db=None):
+        recalled.extend(contents)
+        return [None] * len(contents)
+
+    async def summarize(target, content, model, use_db):
+        summarized.append(target)
+        return f"summary of {target}"
+
+    read_text = Path.read_text
+
+    def failing_read_text(self, *args, **kwargs):
+        if self.name == "locked.py":
+            raise PermissionError(13, "Permission denied")
+        return read_text(self, *args, **kwargs)
+
+    monkeypatch.setattr(devlead, "get_llm", lambda configurable, node: None)
+    monkeypatch.setattr(devlead, "recall_file_summaries", recall)
+    monkeypatch.setattr(devlead, "summarize_file", summarize)
+    monkeypatch.setattr(Path, "read_text", failing_read_text)
+    return recalled, summarized
+
+
+def test_unreadable_files_get_error_messages(project):
+    recalled, summarized = project
+    paths = ["good.py", "missing.py", "package", "locked.py", "../outside.py"]
+    calls = [
+        {"name": "call_code_reader", "args": {"filepath": path}, "id": f"call_{i}"}
+        for i, path in enumerate(paths)
+    ]
+    state = {"messages": [AIMessage(content="", tool_calls=calls)]}
+
+    result = asyncio.run(devlead.code_reader_node(state))
+
+    messages = {message.tool_call_id: message for message in result["messages"]}
+    assert set(messages) == {call["id"] for call in calls}
+    assert messages["call_0"].content == "summary of good.py"
+    assert messages["call_0"].status == "success"
+    for call_id, error in [
+        ("call_1", "File not found."),
+        ("call_2", "Target is not a file."),
+        ("call_3", "Permission denied"),
+        ("call_4", "Access denied."),
+    ]:
+        assert messages[call_id].status == "error"
+        assert error in messages[call_id].content
+    # only contents actually read reach memory and the summarizer
+    assert recalled == ["def good():\n    return 1\n"]
+    assert summarized == ["good.py"]
@@ -0,0 +1,127 @@
+import asyncio
+import os
+
+import pytest
+
+pytest.importorskip("langchain_openai")
+pytest.importorskip("sqlalchemy")
+
+from langchain_core.load import dumps  # noqa: E402
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage  # noqa: E402
+from langchain_core.outputs import ChatGeneration  # noqa: E402
+from langchain_core.tools import tool  # noqa: E402
+from langchain_openai import ChatOpenAI  # noqa: E402
+
+from src.agent import llm_cache  # noqa: E402
+from src.database import dispose_engine, init_db  # noqa: E402
+
+TOOL_CALLS = [
+    {"name": "search_code", "args": {"pattern": "def get_llm", "glob": "*.py"}, "id": "call_1"},
+    {"name": "find_symbol", "args": {"name": "LLMResponseCache"}, "id": "call_2"},
+]
+
+
+@tool
+def search_code(pattern: str, glob: str = "") -> str:
+    """Search the repository."""
+    return ""
+
+
+@tool
+def find_symbol(name: str) -> str:
+    """Find a symbol."""
+    return ""
+
+
+def llm_string(*tools) -> str:
+    # the way BaseChatModel builds it at call time, bound tools come in as kwargs
+    model = ChatOpenAI(model="stub", api_key="stub", temperature=0)
+    return model._get_llm_string(**model.bind_tools(list(tools), strict=True).kwargs)
+
+
+def prompt(message_id: str, input_tokens: int) -> str:
+    # previous turns differ only in ids and token usage
+    return dumps(
+        [
+            HumanMessage(content="where is get_llm defined?", id=f"human-{message_id}"),
+            AIMessage(
+                content="",
+                tool_calls=[{"name": "find_symbol", "args": {"name": "get_llm"}, "id": "call_0"}],
+                id=f"ai-{message_id}",
+                usage_metadata={
+                    "input_tokens": input_tokens,
+                    "output_tokens": 5,
+                    "total_tokens": 5,
+                },
+                response_metadata={"system_fingerprint": message_id},
+            ),
+            ToolMessage(
+                content="src/agent/utils.py:48", tool_call_id="call_0", id=f"tool-{message_id}"
+            ),
+        ]
+    )
+
+
+@pytest.fixture(params=["local", "db"])
+def cache(request, monkeypatch, tmp_path):
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_DIR", tmp_path)
+    if request.param == "local":
+        return llm_cache.LLMResponseCache(use_db=False)
+    if not os.getenv("DATABASE_URL"):
+        # same code path of the cache, rows kept in a dict instead of postgres
+        rows = {}
+
+        async def fetch(cache_key, ttl_seconds):
+            return rows.get(cache_key)
+
+        async def upload(cache_key, generations):
+            rows[cache_key] = generations
+
+        monkeypatch.setattr(llm_cache, "fetch_llm_response", fetch)
+        monkeypatch.setattr(llm_cache, "upload_llm_response", upload)
+    return llm_cache.LLMResponseCache(use_db=True)
+
+
+def run(cache, coroutine):
+    async def wrapped():
+        try:
+            if cache.use_db and os.getenv("DATABASE_URL"):
+                await init_db()
+            return await coroutine
+        finally:
+            await dispose_engine()
+    return asyncio.run(wrapped())
+
+
+def test_tool_calls_round_trip(cache):
+    tools_llm_string = llm_string(search_code, find_symbol)
+    generation = ChatGeneration(message=AIMessage(content="", tool_calls=TOOL_CALLS))
+
+    async def store_and_lookup():
+        await cache.aupdate(prompt("a", 100), tools_llm_string, [generation])
+        return await cache.alookup(prompt("a", 100), tools_llm_string)
+
+    cached = run(cache, store_and_lookup())
+    assert cached is not None and len(cached) == 1
+    message = cached[0].message
+    assert isinstance(message, AIMessage)
+    assert [
+        {"name": call["name"], "args": call["args"], "id": call["id"]}
+        for call in message.tool_calls
+    ] == TOOL_CALLS
+
+
+def test_volatile_fields_hit_and_other_tools_miss(cache):
+    tools_llm_string = llm_string(search_code, find_symbol)
+    generation = ChatGeneration(message=AIMessage(content="", tool_calls=TOOL_CALLS))
+
+    async def lookups():
+        await cache.aupdate(prompt("a", 100), tools_llm_string, [generation])
+        same_history = await cache.alookup(prompt("b", 250), tools_llm_string)
+        other_tools = await cache.alookup(prompt("a", 100), llm_string(search_code))
+        return same_history, other_tools
+
+    same_history, other_tools = run(cache, lookups())
+    assert same_history is not None
+    assert same_history[0].message.tool_calls[0]["args"] == TOOL_CALLS[0]["args"]
+    assert other_tools is None
@@ -0,0 +1,50 @@
+import statistics
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("langchain")
+
+from benchmarks.bench_paper_index import QUERIES, build_synthetic_index  # noqa: E402
+from src.tools import paper_index  # noqa: E402
+
+# the request's target for a local lookup, the generated index is far below it
+MAX_QUERY_SECONDS = 0.05
+
+
+@pytest.fixture(scope="module")
+def index(tmp_path_factory):
+    # several segments, so per-segment offsets and merging are covered as well
+    return build_synthetic_index(tmp_path_factory.mktemp("paper_index"), 20000, 8000)
+
+
+def median_seconds(index, query: str, repeats: int = 5) -> float:
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        index.search_bm25(query, 20)
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def test_numpy_scores_match_python_loop(index, monkeypatch):
+    for query in QUERIES:
+        vectorized = index.search_bm25(query, 20)
+        with monkeypatch.context() as patch:
+            patch.setattr(paper_index, "np", None)
+            looped = index.search_bm25(query, 20)
+        assert len(vectorized) == len(looped) == 20
+        assert [score for score, _, _ in vectorized] == pytest.approx(
+            [score for score, _, _ in looped]
+        )
+
+
+def test_query_latency(index, monkeypatch):
+    for query in QUERIES:
+        vectorized = median_seconds(index, query)
+        with monkeypatch.context() as patch:
+            patch.setattr(paper_index, "np", None)
+            looped = median_seconds(index, query)
+        assert vectorized < MAX_QUERY_SECONDS
+        assert vectorized * 5 < looped
@@ -0,0 +1,75 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("arxiv")
+pytest.importorskip("langchain")
+
+from benchmarks.stub_arxiv_server import start_in_thread  # noqa: E402
+from src.tools import research_tools  # noqa: E402
+
+MIN_INTERVAL = 0.3
+
+
+@pytest.fixture
+def stub(monkeypatch, tmp_path):
+    server = start_in_thread()
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    monkeypatch.setattr(research_tools, "ARXIV_CACHE_DIR", tmp_path)
+    monkeypatch.setattr(research_tools, "ARXIV_API_URL", server.query_url_format)
+    # spacing comes from the shared limiter only, not from the client's own delay
+    monkeypatch.setattr(research_tools, "ARXIV_DELAY_SECONDS", 0.0)
+    monkeypatch.setattr(research_tools, "_arxiv_client", None)
+    monkeypatch.setattr(
+        research_tools, "_arxiv_rate_limiter", research_tools.AsyncRateLimiter(MIN_INTERVAL)
+    )
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def search(*queries: str) -> list:
+    async def run():
+        return await asyncio.gather(
+            *(research_tools.search_arxiv.ainvoke({"query": query}) for query in queries)
+        )
+    return asyncio.run(run())
+
+
+def test_rate_limiter_spaces_concurrent_calls(stub):
+    results = search("graph neural networks", "code summarization", "retrieval augmentation")
+    assert all("Title:" in result for result in results)
+    assert len(stub.request_times) == 3
+    gaps = [b - a for a, b in zip(stub.request_times, stub.request_times[1:])]
+    assert min(gaps) >= MIN_INTERVAL - 0.01
+
+
+def test_repeated_normalized_query_is_cached(stub):
+    first, = search("Graph  Neural Networks")
+    second, = search("  graph neural networks\n")
+    assert first == second
+    assert len(stub.request_times) == 1
+
+
+def test_cache_ttl_expires(stub, monkeypatch):
+    monkeypatch.setattr(research_tools, "ARXIV_CACHE_TTL_SECONDS", 0.5)
+    search("graph neural networks")
+    search("graph neural networks")
+    assert len(stub.request_times) == 1
+    time.sleep(0.6)
+    search("graph neural networks")
+    assert len(stub.request_times) == 2
+
+
+def test_empty_results_expire_sooner(stub, monkeypatch):
+    monkeypatch.setattr(research_tools, "ARXIV_EMPTY_CACHE_TTL_SECONDS", 0.5)
+    empty, = search("nothing to find here")
+    assert empty == research_tools.NO_RESULTS
+    search("graph neural networks")
+    time.sleep(0.6)
+    search("nothing to find here")
+    search("graph neural networks")
+    # empty answer is fetched again, the regular one is still served from the cache
+    assert stub.queries.count(stub.queries[0]) == 2
+    assert len(stub.request_times) == 3